@@ -0,0 +1,85 @@
+# Кэш оценок резюме моделью: (отпечаток резюме, отпечаток вакансии) → score/details
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from .models import Resume, ResumeAnalysis
+from .utils import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def resume_fingerprint(resume: Resume) -> str:
+    """Хэш полей резюме, которые видит модель (позиция, опыт, навыки)"""
+    payload = [
+        normalize_text(resume.position),
+        resume.experience_years,
+        sorted({normalize_text(skill) for skill in resume.skills or [] if skill})
+    ]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def vacancy_fingerprint(job_description: str) -> str:
+    """Хэш текста вакансии без учёта регистра и пробелов"""
+    normalized = " ".join(normalize_text(job_description).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Готовые оценки ResumeAnalysis поверх бэкенда из cache.py.
+
+    Устаревание — по TTL; ограничение размера — LRU бэкенда в памяти
+    или maxmemory-policy allkeys-lru у Redis."""
+
+    def __init__(self, backend, ttl: float = 7 * 24 * 3600, prefix: str = "analysis:"):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    def make_key(self, resume: Resume, vacancy: str) -> str:
+        return f"{self.prefix}{vacancy}:{resume_fingerprint(resume)}"
+
+    async def get_many(self, resumes: Sequence[Resume], job_description: str) -> List[Optional[ResumeAnalysis]]:
+        """Оценки из кэша в порядке resumes (None — промах)"""
+        vacancy = vacancy_fingerprint(job_description)
+        try:
+            values = await self.backend.get_many([self.make_key(resume, vacancy) for resume in resumes])
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Ошибка чтения кэша оценок: {e}")
+            values = [None] * len(resumes)
+
+        results: List[Optional[ResumeAnalysis]] = []
+        for resume, value in zip(resumes, values):
+            if value is None:
+                results.append(None)
+                continue
+            cached = json.loads(value)
+            results.append(ResumeAnalysis(resume=resume, score=cached["score"], details=cached["details"]))
+
+        hits = sum(result is not None for result in results)
+        self.stats["hits"] += hits
+        self.stats["misses"] += len(results) - hits
+        return results
+
+    async def set_many(self, analyses: Sequence[ResumeAnalysis], job_description: str) -> None:
+        vacancy = vacancy_fingerprint(job_description)
+        items = {
+            self.make_key(analysis.resume, vacancy): json.dumps(
+                {"score": analysis.score, "details": analysis.details}, ensure_ascii=False
+            ).encode("utf-8")
+            for analysis in analyses
+        }
+        if not items:
+            return
+        try:
+            await self.backend.set_many(items, self.ttl)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Ошибка записи в кэш оценок: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {**self.stats, "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0}
@@ -0,0 +1,112 @@
+# Индекс регионов HH: название → id без обхода дерева /areas
+import bisect
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_area_name(name: str) -> str:
+    """Нормализация названия: регистр, ё → е, лишние пробелы"""
+    return _SPACES.sub(" ", name.casefold().replace("ё", "е")).strip()
+
+
+class AreaIndex:
+    """Плоский индекс всех уровней дерева регионов с TTL и сохранением на диск"""
+
+    def __init__(self, ttl: float = 24 * 3600, path: Optional[str] = None):
+        self.ttl = ttl
+        self.path = path
+        self.by_name: Dict[str, str] = {}
+        self.names: Dict[str, str] = {}  # id → исходное название
+        self.parents: Dict[str, Optional[str]] = {}
+        self.sorted_keys: List[str] = []
+        self.built_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.by_name)
+
+    @property
+    def is_stale(self) -> bool:
+        return not self.by_name or time.time() - self.built_at > self.ttl
+
+    def build(self, tree: List[Dict[str, Any]], built_at: Optional[float] = None) -> None:
+        """Построение индекса из ответа /areas (обход в ширину: при совпадении
+        названий побеждает более крупный регион)"""
+        by_name: Dict[str, str] = {}
+        names: Dict[str, str] = {}
+        parents: Dict[str, Optional[str]] = {}
+
+        level: List[Tuple[Dict[str, Any], Optional[str]]] = [(area, None) for area in tree]
+        while level:
+            next_level = []
+            for area, parent_id in level:
+                area_id = str(area["id"])
+                names[area_id] = area["name"]
+                parents[area_id] = parent_id
+                by_name.setdefault(normalize_area_name(area["name"]), area_id)
+                next_level.extend((child, area_id) for child in area.get("areas") or [])
+            level = next_level
+
+        self.by_name = by_name
+        self.names = names
+        self.parents = parents
+        self.sorted_keys = sorted(by_name)
+        self.built_at = built_at or time.time()
+
+    def get(self, name: str) -> Optional[str]:
+        """ID региона по точному (нормализованному) названию"""
+        return self.by_name.get(normalize_area_name(name))
+
+    def search_prefix(self, prefix: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Регионы, чьё название начинается с prefix: [(название, id), ...]"""
+        key = normalize_area_name(prefix)
+        start = bisect.bisect_left(self.sorted_keys, key)
+        matches = []
+        for name in self.sorted_keys[start:]:
+            if not name.startswith(key) or len(matches) >= limit:
+                break
+            area_id = self.by_name[name]
+            matches.append((self.names[area_id], area_id))
+        return matches
+
+    def children(self, area_id: str) -> List[str]:
+        """Прямые потомки региона"""
+        return [child for child, parent in self.parents.items() if parent == area_id]
+
+    def save(self) -> None:
+        """Сохранение индекса на диск, чтобы холодный старт не качал /areas"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "built_at": self.built_at,
+                "names": self.names,
+                "parents": self.parents,
+                "by_name": self.by_name
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> bool:
+        """Загрузка индекса с диска; False, если файла нет или он повреждён"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.names = data["names"]
+            self.parents = data["parents"]
+            self.by_name = data["by_name"]
+            self.sorted_keys = sorted(self.by_name)
+            self.built_at = data["built_at"]
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Не удалось загрузить индекс регионов: {e}")
+            return False
@@ -0,0 +1,291 @@
+# Клиент API Avito Работа (резюме)
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from pydantic import BaseModel
+
+from .areas import normalize_area_name
+from .models import ResumeCreate
+from .sources import HarvestStats, KnownVersions, ResumeSource
+from .utils import TokenBucket, backoff_delay, to_utc_naive
+
+logger = logging.getLogger(__name__)
+
+# ID регионов Avito (параметр location поиска)
+AVITO_LOCATIONS = {
+    "россия": 621540,
+    "москва": 637640,
+    "санкт-петербург": 653240,
+    "екатеринбург": 654070,
+    "новосибирск": 641780,
+    "казань": 650400,
+}
+
+
+class AvitoResumeItem(BaseModel):
+    """Резюме в выдаче поиска"""
+    id: int
+    title: str
+    url: Optional[str] = None
+    updated_at: datetime
+    location: Optional[str] = None
+    salary: Optional[int] = None
+
+
+class AvitoSearchPage(BaseModel):
+    resumes: List[AvitoResumeItem] = []
+    total: int = 0
+    pages: int = 0
+
+
+class AvitoResume(BaseModel):
+    """Полное резюме: /job/v2/resumes/{id}"""
+    id: int
+    title: str
+    fullname: Optional[str] = None
+    url: Optional[str] = None
+    updated_at: datetime
+    location: Optional[str] = None
+    salary: Optional[int] = None
+    description: Optional[str] = None
+    params: Dict[str, Any] = {}
+    contacts: Optional[Dict[str, Any]] = None
+
+
+class AvitoClient(ResumeSource):
+    name = "avito"
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        *,
+        base_url: str = "https://api.avito.ru",
+        max_connections: int = 10,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        requests_per_second: float = 5,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        locations: Optional[Dict[str, int]] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.access_token: Optional[str] = None
+        self.token_expires: Optional[datetime] = None
+        self._token_lock = asyncio.Lock()
+        # Свой лимит: квоты Avito не связаны с лимитами HH
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.locations = locations or AVITO_LOCATIONS
+        self.stats = {"requests": 0, "retries": 0, "backoff_seconds": 0.0}
+
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.timeout = httpx.Timeout(timeout)
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def startup(self) -> None:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self.transport
+            )
+
+    async def shutdown(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backoff_seconds": round(self.stats["backoff_seconds"], 3),
+            "rate_limiter": self.rate_limiter.metrics()
+        }
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            await self.startup()
+        return self._client
+
+    async def _get_access_token(self) -> str:
+        """OAuth-токен (client_credentials); один запрос на всех ожидающих"""
+        async with self._token_lock:
+            if self.access_token and self.token_expires and datetime.now() < self.token_expires:
+                return self.access_token
+            client = await self._get_client()
+            response = await client.post("/token", data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret
+            })
+            response.raise_for_status()
+            data = response.json()
+            self.access_token = data["access_token"]
+            # Запас в минуту, чтобы токен не истёк посреди запроса
+            self.token_expires = datetime.now() + timedelta(seconds=data["expires_in"] - 60)
+            return self.access_token
+
+    async def _make_request(self, endpoint: str, params: Optional[dict] = None) -> Dict[str, Any]:
+        """GET с учётом лимита и повторами при 429"""
+        client = await self._get_client()
+        for attempt in range(self.max_retries + 1):
+            token = await self._get_access_token()
+            await self.rate_limiter.acquire()
+            self.stats["requests"] += 1
+            response = await client.get(endpoint, params=params, headers={"Authorization": f"Bearer {token}"})
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+
+            delay = backoff_delay(
+                attempt,
+                base=self.backoff_base,
+                cap=self.backoff_cap,
+                retry_after=response.headers.get("Retry-After")
+            )
+            self.rate_limiter.pause(delay)
+            self.stats["retries"] += 1
+            self.stats["backoff_seconds"] += delay
+            logger.warning(f"Avito: превышен лимит запросов, повтор {attempt + 1} через {delay:.2f} с")
+
+        response.raise_for_status()
+        return response.json()
+
+    async def search_page(self, query: str, location: int, page: int = 1, per_page: int = 50) -> AvitoSearchPage:
+        """Страница поиска резюме (страницы с 1), от новых к старым"""
+        data = await self._make_request("/job/v1/resumes/", {
+            "query": query,
+            "location": location,
+            "page": page,
+            "per_page": per_page,
+            "sort": "updated_at"
+        })
+        meta = data.get("meta") or {}
+        return AvitoSearchPage(
+            resumes=data.get("resumes") or [],
+            total=meta.get("total", 0),
+            pages=meta.get("pages", 0)
+        )
+
+    async def get_resume(self, resume_id: int) -> Optional[AvitoResume]:
+        try:
+            return AvitoResume(**await self._make_request(f"/job/v2/resumes/{resume_id}"))
+        except Exception as e:
+            logger.error(f"Ошибка получения резюме Avito {resume_id}: {e}")
+            return None
+
+    async def iter_resumes(
+        self,
+        position: str,
+        city: str,
+        *,
+        limit: int = 1000,
+        known_versions: Optional[KnownVersions] = None,
+        stats: Optional[HarvestStats] = None,
+        newer_than: Optional[datetime] = None,
+        concurrency: int = 5
+    ) -> AsyncIterator[ResumeCreate]:
+        """Резюме по мере готовности: детали страницы — параллельно (не более
+        concurrency), следующая страница поиска — после них"""
+        stats = stats if stats is not None else HarvestStats()
+        location = self.locations.get(normalize_area_name(city))
+        if location is None:
+            logger.warning(f"Avito: неизвестный регион {city}")
+            return
+
+        per_page = min(50, limit)
+        semaphore = asyncio.Semaphore(concurrency)
+        queued = 0
+        page = 1
+        while queued < limit:
+            try:
+                result = await self.search_page(position, location, page, per_page)
+            except Exception as e:
+                stats.failed_pages += 1
+                logger.error(f"Ошибка поиска резюме Avito (страница {page}): {e}")
+                return
+
+            if len(result.resumes) > limit - queued:
+                stats.limited = True
+            items = result.resumes[:limit - queued]
+            reached_old = False
+            if newer_than is not None:
+                fresh = [item for item in items if to_utc_naive(item.updated_at) > newer_than]
+                reached_old = len(fresh) < len(items)
+                items = fresh
+            for item in items:
+                updated_at = to_utc_naive(item.updated_at)
+                if stats.newest is None or updated_at > stats.newest:
+                    stats.newest = updated_at
+            queued += len(items)
+            stats.found += len(items)
+
+            known = {}
+            if known_versions is not None and items:
+                known = await known_versions([str(item.id) for item in items])
+            to_fetch = []
+            for item in items:
+                stored_at = known.get(str(item.id))
+                if stored_at and stored_at >= to_utc_naive(item.updated_at):
+                    stats.skipped_ids.append(str(item.id))
+                else:
+                    to_fetch.append(item)
+
+            async def fetch(item: AvitoResumeItem) -> Optional[ResumeCreate]:
+                async with semaphore:
+                    stats.details_fetched += 1
+                    resume = await self.get_resume(item.id)
+                if resume is None:
+                    stats.failed_details += 1
+                    return None
+                return self._convert(resume)
+
+            tasks = [asyncio.create_task(fetch(item)) for item in to_fetch]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    resume = await task
+                    if resume:
+                        yield resume
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            if reached_old or len(result.resumes) < per_page or page >= result.pages:
+                return
+            if queued >= limit:
+                stats.limited = True
+                return
+            page += 1
+
+    def _convert(self, resume: AvitoResume) -> ResumeCreate:
+        """Преобразование резюме Avito в нашу модель"""
+        params = resume.params or {}
+        experience = params.get("experience")
+        skills = params.get("skills") or []
+        contacts = resume.contacts or {}
+        return ResumeCreate(
+            source="avito",
+            source_id=str(resume.id),
+            fio=resume.fullname,
+            city=resume.location[:50] if resume.location else None,
+            experience_years=int(experience) if isinstance(experience, (int, float)) else None,
+            position=resume.title.split(",")[0].strip()[:100],
+            skills=[skill for skill in skills if isinstance(skill, str)],
+            salary_expect=resume.salary,
+            published_at=to_utc_naive(resume.updated_at),
+            json_raw={
+                "avito_data": resume.dict(),
+                "contacts": {"email": contacts.get("email"), "phone": contacts.get("phone")}
+            }
+        )
@@ -0,0 +1,178 @@
+# Кэш ответов HH поверх Redis (или памяти процесса)
+import hashlib
+import json
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """LRU-кэш в памяти процесса с истечением по TTL (для тестов и локального запуска)"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self.data[key]
+            return None
+        self.data.move_to_end(key)
+        return value
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.data[key] = (time.monotonic() + ttl, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.max_entries:
+            self.data.popitem(last=False)
+
+    async def set_many(self, items: Dict[str, bytes], ttl: float) -> None:
+        for key, value in items.items():
+            await self.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+
+class RedisCacheBackend:
+    """Кэш в Redis (aioredis)"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(key)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self.redis.mget(keys) if keys else []
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.redis.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def set_many(self, items: Dict[str, bytes], ttl: float) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, px=max(1, int(ttl * 1000)))
+            await pipe.execute()
+
+    async def delete(self, key: str) -> None:
+        await self.redis.delete(key)
+
+
+class CacheEntry(BaseModel):
+    data: Any
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float
+    fresh: bool = True
+
+
+class ResponseCache:
+    """Кэш ответов API с TTL по эндпоинтам, сжатием и данными для условных запросов.
+
+    Запись живёт в хранилище в stale_factor раз дольше своего TTL: после
+    истечения TTL она считается устаревшей, но её ETag/Last-Modified
+    используются для условного запроса (ответ 304 не тратит трафик)."""
+
+    DEFAULT_TTLS = {
+        "search": 300,    # /resumes — страницы поиска
+        "resume": 3600,   # /resumes/{id} — детали резюме
+        "default": 600,
+    }
+
+    def __init__(
+        self,
+        backend,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_factor: float = 4,
+        prefix: str = "hh:",
+        compress_level: int = 6
+    ):
+        self.backend = backend
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.stale_factor = stale_factor
+        self.prefix = prefix
+        self.compress_level = compress_level
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "revalidated": 0, "errors": 0}
+
+    def ttl_for(self, endpoint: str) -> float:
+        if endpoint == "/resumes":
+            return self.ttls["search"]
+        if endpoint.startswith("/resumes/"):
+            return self.ttls["resume"]
+        return self.ttls["default"]
+
+    def make_key(self, endpoint: str, params: Optional[dict] = None) -> str:
+        """Ключ из эндпоинта и нормализованных параметров"""
+        normalized = {}
+        for name, value in (params or {}).items():
+            if value is None:
+                continue
+            value = " ".join(str(value).split())
+            normalized[name] = value.casefold() if name == "text" else value
+        digest = hashlib.sha1(
+            json.dumps(normalized, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        return f"{self.prefix}{endpoint}:{digest}"
+
+    async def get(self, endpoint: str, params: Optional[dict] = None) -> Optional[CacheEntry]:
+        """Запись из кэша (в том числе устаревшая, с fresh=False) или None"""
+        try:
+            raw = await self.backend.get(self.make_key(endpoint, params))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Ошибка чтения кэша: {e}")
+            return None
+
+        if raw is None:
+            self.stats["misses"] += 1
+            return None
+
+        entry = CacheEntry(**orjson.loads(zlib.decompress(raw)))
+        entry.fresh = time.time() - entry.fetched_at < self.ttl_for(endpoint)
+        self.stats["hits" if entry.fresh else "stale"] += 1
+        return entry
+
+    async def set(
+        self,
+        endpoint: str,
+        params: Optional[dict],
+        data: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> None:
+        # Словарь вместо entry.dict(): dict() глубоко копирует data
+        entry = {"data": data, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()}
+        value = zlib.compress(orjson.dumps(entry), self.compress_level)
+        try:
+            await self.backend.set(
+                self.make_key(endpoint, params),
+                value,
+                self.ttl_for(endpoint) * self.stale_factor
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Ошибка записи в кэш: {e}")
+
+    async def revalidate(self, endpoint: str, params: Optional[dict], entry: CacheEntry) -> None:
+        """Продление записи после ответа 304 Not Modified"""
+        self.stats["revalidated"] += 1
+        await self.set(endpoint, params, entry.data, entry.etag, entry.last_modified)
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["stale"]
+        return {**self.stats, "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0}
@@ -0,0 +1,231 @@
+# Фоновый сборщик: периодический инкрементальный обход заданных запросов к HH
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from .crud import CRUDResume, CRUDCrawlWatermark
+from .database import async_session
+from .embeddings import Embedder
+from .hh_client import HHClient
+from .sources import HarvestStats
+from .models import CrawlWatermark, ResumeCreate
+from .utils import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """Аренду запроса перехватила другая реплика (наша истекла)"""
+
+
+def crawl_key(position: str, city: str) -> str:
+    """Ключ запроса сборщика: регистр и ё/е не различаются"""
+    return hashlib.sha1(f"{normalize_text(position)}|{normalize_text(city)}".encode("utf-8")).hexdigest()
+
+
+def crawl_progress(
+    shard: CrawlWatermark,
+    stats: HarvestStats
+) -> Tuple[Optional[datetime], Optional[datetime], Optional[datetime]]:
+    """Водяной знак и точка продолжения (backfill_to, backfill_watermark)
+    после обхода без ошибок. Водяной знак сдвигается только после полного
+    прохода: иначе не сохранённые резюме (limit, сбои страниц и деталей)
+    окажутся за ним. Неполный проход запоминает, новее какой даты всё
+    обработано (stats.covered_to), и следующие обходы берут только более
+    старые резюме, пока проход не завершится."""
+    if stats.complete:
+        if shard.backfill_to is not None:
+            return shard.backfill_watermark, None, None
+        return stats.newest, None, None
+    if stats.covered_to is None or (shard.watermark is not None and stats.covered_to <= shard.watermark):
+        return None, shard.backfill_to, shard.backfill_watermark
+    if shard.backfill_to is None:
+        return None, stats.covered_to, stats.newest
+    return None, min(shard.backfill_to, stats.covered_to), shard.backfill_watermark
+
+
+def parse_queries(value: str) -> List[Tuple[str, str]]:
+    """«Python Developer@Москва; Data Scientist@Казань» → [(должность, город)];
+    без «@» город — Москва"""
+    queries = []
+    for item in value.split(";"):
+        position, _, city = item.partition("@")
+        if position.strip():
+            queries.append((position.strip(), city.strip() or "Москва"))
+    return queries
+
+
+class Crawler:
+    """Обходит запросы (должность, город) по расписанию и сохраняет новые резюме.
+
+    Для каждого запроса хранится водяной знак — время самого свежего
+    обработанного резюме; следующий обход берёт только более новые. limit
+    ограничивает число новых и изменившихся резюме за обход; проход,
+    остановленный на нём, продолжается следующими обходами (crawl_progress). Запросы
+    раздаются воркерам через аренду в таблице crawlwatermark, поэтому
+    несколько реплик API делят их между собой без повторов."""
+
+    def __init__(
+        self,
+        hh_client: HHClient,
+        queries: List[Tuple[str, str]],
+        *,
+        embedder: Optional[Embedder] = None,
+        owner: Optional[str] = None,
+        interval: float = 3600,
+        tick: float = 60,
+        lease_ttl: float = 600,
+        concurrency: int = 2,
+        limit: int = 2000,
+        batch_size: int = 500
+    ):
+        self.hh_client = hh_client
+        self.shards = [
+            CrawlWatermark(key=crawl_key(position, city), position=position[:100], city=city[:50])
+            for position, city in queries
+        ]
+        self.embedder = embedder
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.interval = timedelta(seconds=interval)
+        self.tick = tick
+        self.lease_ttl = timedelta(seconds=lease_ttl)
+        self.concurrency = concurrency
+        self.limit = limit
+        self.batch_size = batch_size
+        self.stats = {"runs": 0, "crawled": 0, "stored": 0, "errors": 0, "leases_lost": 0}
+        self.scheduler: Optional[AsyncIOScheduler] = None
+        self._registered = False
+
+    def start(self) -> None:
+        """Запуск по расписанию: первый тик сразу, затем раз в tick секунд"""
+        if not self.shards or self.scheduler is not None:
+            return
+        self.scheduler = AsyncIOScheduler(timezone=timezone.utc)
+        self.scheduler.add_job(
+            self.run_once,
+            "interval",
+            seconds=self.tick,
+            next_run_time=datetime.now(timezone.utc),
+            max_instances=1,
+            coalesce=True,
+            id="crawler"
+        )
+        self.scheduler.start()
+
+    def shutdown(self) -> None:
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "owner": self.owner, "queries": len(self.shards)}
+
+    async def status(self) -> List[CrawlWatermark]:
+        """Водяные знаки и аренды запросов из базы"""
+        async with async_session() as session:
+            return await CRUDCrawlWatermark(session).get_multi([shard.key for shard in self.shards])
+
+    async def run_once(self) -> int:
+        """Один тик: воркеры арендуют запросы, пока есть те, которые пора обойти;
+        возвращает число обойдённых"""
+        if not self._registered:
+            async with async_session() as session:
+                await CRUDCrawlWatermark(session).ensure(self.shards)
+            self._registered = True
+        self.stats["runs"] += 1
+        crawled = await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+        return sum(crawled)
+
+    async def _worker(self) -> int:
+        keys = [shard.key for shard in self.shards]
+        crawled = 0
+        while True:
+            async with async_session() as session:
+                shard = await CRUDCrawlWatermark(session).acquire(keys, self.owner, self.lease_ttl, self.interval)
+            if shard is None:
+                return crawled
+            await self.crawl(shard)
+            crawled += 1
+
+    async def crawl(self, shard: CrawlWatermark) -> int:
+        """Обход одного арендованного запроса; число сохранённых резюме"""
+        stats = HarvestStats()
+        stored = 0
+        error: Optional[str] = None
+        # Чтение версий идёт из конвейера HHClient параллельно с записью — разные сессии
+        async with async_session() as read_session, async_session() as write_session:
+            known = CRUDResume(read_session)
+            crud = CRUDResume(write_session)
+            leases = CRUDCrawlWatermark(write_session)
+            batch: List[ResumeCreate] = []
+            try:
+                async for resume in self.hh_client.iter_resumes_from_hh(
+                    shard.position,
+                    shard.city,
+                    limit=None,
+                    fetch_limit=self.limit,
+                    known_versions=lambda ids: known.get_versions_by_source("hh", ids),
+                    stats=stats,
+                    newer_than=shard.watermark,
+                    older_than=shard.backfill_to
+                ):
+                    batch.append(resume)
+                    if len(batch) >= self.batch_size:
+                        stored += await self._store(crud, leases, shard, batch)
+                        batch = []
+                stored += await self._store(crud, leases, shard, batch)
+            except LeaseLost:
+                self.stats["leases_lost"] += 1
+                logger.warning(f"Аренда запроса «{shard.position}@{shard.city}» потеряна, обход прерван")
+                return stored
+            except asyncio.CancelledError:
+                error = "cancelled"
+                raise
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                self.stats["errors"] += 1
+                logger.exception(f"Ошибка обхода «{shard.position}@{shard.city}»")
+            finally:
+                self.stats["stored"] += stored
+                # При остановке приложения аренду не снимаем — она истечёт через lease_ttl;
+                # после потери аренды release ничего не меняет (условие по владельцу)
+                if error != "cancelled":
+                    watermark, backfill_to, backfill_watermark = crawl_progress(shard, stats)
+                    await leases.release(
+                        shard.key,
+                        self.owner,
+                        stored=stored,
+                        watermark=watermark,
+                        backfill_to=backfill_to,
+                        backfill_watermark=backfill_watermark,
+                        error=error
+                    )
+
+        self.stats["crawled"] += 1
+        logger.info(
+            f"Обход «{shard.position}@{shard.city}»: найдено {stats.found}, "
+            f"сохранено {stored}, без изменений {len(stats.skipped_ids)}"
+        )
+        return stored
+
+    async def _store(
+        self,
+        crud: CRUDResume,
+        leases: CRUDCrawlWatermark,
+        shard: CrawlWatermark,
+        batch: List[ResumeCreate]
+    ) -> int:
+        """Запись пакета и продление аренды"""
+        if not await leases.renew(shard.key, self.owner, self.lease_ttl):
+            raise LeaseLost(shard.key)
+        if not batch:
+            return 0
+        result = await crud.bulk_upsert(batch, embedder=self.embedder)
+        return result.inserted + result.updated
@@ -1,11 +1,46 @@
 # Операции с БД
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, or_
-from typing import List, Optional
+from sqlalchemy import func, or_, cast, literal, literal_column, tuple_, text, bindparam
+from sqlalchemy.dialects.postgresql import insert, REGCONFIG
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import defer
+from typing import Any, AsyncIterator, Dict, List, Optional
+import base64
+import json
 import uuid
-from datetime import datetime
-from .models import Resume, ResumeCreate, ResumeUpdate, Duplicate
+from datetime import datetime, timedelta
+from .models import Resume, ResumeCreate, ResumeUpdate, Duplicate, BulkUpsertResult, ResumePage, ResumeMatch
+from .models import ResumeSummary
+from .models import RankingResult, CrawlWatermark
+from .models import resume_search_vector, resume_embedding
+from .embeddings import Embedder
+from .prerank import resume_text
+
+# Поля, изменение которых считается изменением содержимого резюме
+CONTENT_FIELDS = (
+    "fio", "city", "experience_years", "position",
+    "skills", "salary_expect", "published_at"
+)
+
+# Колонки списков и выдачи поиска: всё, кроме тяжёлого json_raw
+SUMMARY_COLUMNS = tuple(getattr(Resume, field) for field in ResumeSummary.__fields__)
+
+def encode_cursor(*values: Any) -> str:
+    """Непрозрачный курсор для keyset-пагинации"""
+    payload = json.dumps([str(value) if value is not None else None for value in values])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Optional[str]]:
+    """Разбор курсора; ValueError, если он повреждён"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Некорректный курсор") from e
+    if not isinstance(values, list):
+        raise ValueError("Некорректный курсор")
+    return values
 
 class CRUDResume:
     def __init__(self, session: AsyncSession):
@@ -31,10 +66,74 @@ class CRUDResume:
         await self.session.refresh(db_resume)
         return db_resume
 
+    async def bulk_upsert(
+        self,
+        resumes: List[ResumeCreate],
+        batch_size: int = 500,
+        embedder: Optional[Embedder] = None
+    ) -> BulkUpsertResult:
+        """Пакетная вставка/обновление резюме по (source, source_id).
+
+        Каждый пакет — один INSERT ... ON CONFLICT DO UPDATE в своей транзакции;
+        существующая строка обновляется только при изменении содержимого.
+        С embedder заодно записывается эмбеддинг резюме."""
+        result = BulkUpsertResult()
+
+        # Внутри одного INSERT ключ не может встречаться дважды — оставляем последнюю версию
+        unique = {(resume.source, resume.source_id): resume for resume in resumes}
+        rows = list(unique.values())
+        table = Resume.__table__
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            now = datetime.utcnow()
+            values = [
+                {**resume.dict(), "id": uuid.uuid4(), "created_at": now, "updated_at": now}
+                for resume in batch
+            ]
+            if embedder:
+                vectors = await embedder.embed([resume_text(resume) for resume in batch])
+                for row, vector in zip(values, vectors):
+                    row["embedding"] = vector
+            stmt = insert(table).values(values)
+            excluded = stmt.excluded
+            changed = or_(
+                table.c.json_raw.is_distinct_from(excluded.json_raw),
+                *(table.c[field].is_distinct_from(excluded[field]) for field in CONTENT_FIELDS)
+            )
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_resume_source",
+                set_={
+                    **{field: excluded[field] for field in CONTENT_FIELDS},
+                    "json_raw": excluded.json_raw,
+                    "updated_at": excluded.updated_at,
+                    **({"embedding": excluded.embedding} if embedder else {})
+                },
+                where=changed
+            ).returning(literal_column("xmax = 0").label("inserted"))
+
+            written = (await self.session.execute(stmt)).scalars().all()
+            await self.session.commit()
+
+            inserted = sum(1 for is_new in written if is_new)
+            result.inserted += inserted
+            result.updated += len(written) - inserted
+            result.unchanged += len(batch) - len(written)
+
+        return result
+
     async def get(self, resume_id: uuid.UUID) -> Optional[Resume]:
-        """Получение резюме по ID"""
+        """Получение резюме по ID; json_raw не загружается (см. get_raw)"""
+        result = await self.session.execute(
+            select(Resume).where(Resume.id == resume_id).options(defer(Resume.json_raw, raiseload=True))
+        )
+        return result.scalars().first()
+
+    async def get_raw(self, resume_id: uuid.UUID) -> Optional[dict]:
+        """Исходные данные источника (json_raw) одного резюме"""
         result = await self.session.execute(
-            select(Resume).where(Resume.id == resume_id)
+            select(Resume.json_raw).where(Resume.id == resume_id)
+        )
         return result.scalars().first()
 
     async def get_by_source(self, source: str, source_id: str) -> Optional[Resume]:
@@ -46,41 +145,215 @@ class CRUDResume:
         )
         return result.scalars().first()
 
-    async def get_multi(
+    async def get_versions_by_source(self, source: str, source_ids: List[str]) -> Dict[str, Optional[datetime]]:
+        """Даты публикации сохранённых резюме одним запросом (пакетный аналог get_by_source)"""
+        if not source_ids:
+            return {}
+        result = await self.session.execute(
+            select(Resume.source_id, Resume.published_at)
+            .where(Resume.source == source)
+            .where(Resume.source_id.in_(source_ids))
+        )
+        return dict(result.all())
+
+    async def get_many_by_source(self, source: str, source_ids: List[str]) -> List[Resume]:
+        """Получение нескольких резюме по источнику и списку ID источника
+        вместе с json_raw (нужен для предранжирования и эмбеддингов)"""
+        if not source_ids:
+            return []
+        result = await self.session.execute(
+            select(Resume)
+            .where(Resume.source == source)
+            .where(Resume.source_id.in_(source_ids))
+        )
+        return result.scalars().all()
+
+    def _apply_filters(
         self,
+        query,
         *,
-        skip: int = 0,
-        limit: int = 100,
         q: Optional[str] = None,
         city: Optional[str] = None,
         exp_min: Optional[int] = None,
         exp_max: Optional[int] = None
-    ) -> List[Resume]:
-        """Получение списка резюме с фильтрами"""
-        query = select(Resume)
-        
+    ):
+        """Общие фильтры списка резюме (под индексы из models.Resume)"""
         if q:
             query = query.where(
                 or_(
                     Resume.position.ilike(f"%{q}%"),
-                    Resume.skills.any(q),
+                    Resume.skills.contains([q]),
                     Resume.fio.ilike(f"%{q}%")
                 )
             )
-        
+
         if city:
             query = query.where(Resume.city.ilike(f"%{city}%"))
-        
+
         if exp_min is not None:
             query = query.where(Resume.experience_years >= exp_min)
-        
+
         if exp_max is not None:
             query = query.where(Resume.experience_years <= exp_max)
-        
+
+        return query
+
+    async def get_multi(
+        self,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        q: Optional[str] = None,
+        city: Optional[str] = None,
+        exp_min: Optional[int] = None,
+        exp_max: Optional[int] = None
+    ) -> List[ResumeSummary]:
+        """Получение списка резюме с фильтрами"""
+        query = self._apply_filters(select(*SUMMARY_COLUMNS), q=q, city=city, exp_min=exp_min, exp_max=exp_max)
         query = query.offset(skip).limit(limit)
         
         result = await self.session.execute(query)
-        return result.scalars().all()
+        return [ResumeSummary(**row._mapping) for row in result]
+
+    async def get_page(
+        self,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        q: Optional[str] = None,
+        city: Optional[str] = None,
+        exp_min: Optional[int] = None,
+        exp_max: Optional[int] = None
+    ) -> ResumePage:
+        """Страница резюме с keyset-пагинацией по (published_at, id): скорость
+        не зависит от глубины, в отличие от OFFSET в get_multi"""
+        query = self._apply_filters(select(*SUMMARY_COLUMNS), q=q, city=city, exp_min=exp_min, exp_max=exp_max)
+
+        if cursor:
+            published_at, last_id = decode_cursor(cursor)
+            try:
+                last_id = uuid.UUID(last_id)
+                published_at = datetime.fromisoformat(published_at) if published_at else None
+            except (TypeError, ValueError) as e:
+                raise ValueError("Некорректный курсор") from e
+
+            if published_at is None:
+                # Уже дошли до резюме без даты публикации (они идут в конце)
+                query = query.where(Resume.published_at.is_(None), Resume.id < last_id)
+            else:
+                query = query.where(or_(
+                    tuple_(Resume.published_at, Resume.id) < tuple_(published_at, last_id),
+                    Resume.published_at.is_(None)
+                ))
+
+        query = query.order_by(Resume.published_at.desc().nullslast(), Resume.id.desc()).limit(limit + 1)
+        rows = (await self.session.execute(query)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last.published_at.isoformat() if last.published_at else None, last.id)
+        return ResumePage(items=[ResumeSummary(**row._mapping) for row in rows], next_cursor=next_cursor)
+
+    async def stream(
+        self,
+        *,
+        q: Optional[str] = None,
+        city: Optional[str] = None,
+        exp_min: Optional[int] = None,
+        exp_max: Optional[int] = None,
+        include_raw: bool = False,
+        batch_size: int = 1000
+    ) -> AsyncIterator[Row]:
+        """Потоковое чтение резюме через серверный курсор (yield_per):
+        память не зависит от размера выборки. Строки с полями ResumeSummary,
+        json_raw — только с include_raw"""
+        columns = [*SUMMARY_COLUMNS, Resume.json_raw] if include_raw else SUMMARY_COLUMNS
+        query = self._apply_filters(select(*columns), q=q, city=city, exp_min=exp_min, exp_max=exp_max)
+        query = query.order_by(Resume.published_at.desc().nullslast(), Resume.id.desc())
+
+        result = await self.session.stream(query.execution_options(yield_per=batch_size))
+        async for row in result:
+            yield row
+
+    async def search(
+        self,
+        text_query: str,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        city: Optional[str] = None,
+        exp_min: Optional[int] = None,
+        exp_max: Optional[int] = None
+    ) -> ResumePage:
+        """Полнотекстовый поиск с русской морфологией: результаты по убыванию
+        ts_rank, keyset-пагинация по (rank, id)"""
+        ts_query = func.websearch_to_tsquery(cast(literal("russian"), REGCONFIG), text_query)
+        rank = func.ts_rank(resume_search_vector, ts_query)
+
+        query = self._apply_filters(select(*SUMMARY_COLUMNS, rank.label("rank")), city=city, exp_min=exp_min, exp_max=exp_max)
+        query = query.where(resume_search_vector.op("@@")(ts_query))
+
+        if cursor:
+            last_rank, last_id = decode_cursor(cursor)
+            try:
+                last_rank = float(last_rank)
+                last_id = uuid.UUID(last_id)
+            except (TypeError, ValueError) as e:
+                raise ValueError("Некорректный курсор") from e
+            query = query.where(tuple_(rank, Resume.id) < tuple_(last_rank, last_id))
+
+        query = query.order_by(rank.desc(), Resume.id.desc()).limit(limit + 1)
+        rows = (await self.session.execute(query)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].rank, rows[-1].id)
+        return ResumePage(items=[ResumeSummary(**row._mapping) for row in rows], next_cursor=next_cursor)
+
+    async def embed_missing(self, embedder: Embedder, batch_size: int = 500) -> int:
+        """Дозаполнение эмбеддингов у резюме, сохранённых без них; число обработанных"""
+        total = 0
+        while True:
+            batch = (await self.session.execute(
+                select(Resume).where(resume_embedding.is_(None)).order_by(Resume.id).limit(batch_size)
+            )).scalars().all()
+            if not batch:
+                return total
+
+            vectors = await embedder.embed([resume_text(resume) for resume in batch])
+            await self.session.execute(
+                Resume.__table__.update()
+                .where(Resume.__table__.c.id == bindparam("resume_id"))
+                .values(embedding=bindparam("vector")),
+                [{"resume_id": resume.id, "vector": vector} for resume, vector in zip(batch, vectors)]
+            )
+            await self.session.commit()
+            total += len(batch)
+
+    async def nearest(
+        self,
+        embedding: Any,
+        *,
+        limit: int = 20,
+        city: Optional[str] = None,
+        exp_min: Optional[int] = None,
+        exp_max: Optional[int] = None
+    ) -> List[ResumeMatch]:
+        """Ближайшие по косинусному расстоянию резюме (ANN по HNSW-индексу)"""
+        distance = resume_embedding.cosine_distance(embedding)
+        query = self._apply_filters(select(*SUMMARY_COLUMNS, distance.label("distance")), city=city, exp_min=exp_min, exp_max=exp_max)
+        query = query.where(resume_embedding.is_not(None)).order_by(distance).limit(limit)
+
+        if city or exp_min is not None or exp_max is not None:
+            # Фильтры применяются после обхода индекса: берём больше кандидатов,
+            # чтобы после отсева осталось limit строк
+            await self.session.execute(text(f"SET LOCAL hnsw.ef_search = {max(40, min(limit * 10, 1000))}"))
+
+        rows = (await self.session.execute(query)).all()
+        return [ResumeMatch(resume=ResumeSummary(**row._mapping), similarity=1 - row.distance) for row in rows]
 
     async def update(self, resume_id: uuid.UUID, resume_data: ResumeUpdate) -> Optional[Resume]:
         """Обновление данных резюме"""
@@ -126,7 +399,7 @@ class CRUDResume:
             Resume.fio == current_resume.fio,
             Resume.position == current_resume.position,
             Resume.id != current_resume.id
-        )
+        ).options(defer(Resume.json_raw, raiseload=True))
         
         result = await self.session.execute(query)
         return result.scalars().all()
@@ -152,4 +425,114 @@ class CRUDResume:
             )
         )
         result = await self.session.execute(query)
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().all()
+
+class CRUDRankingResult:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, result: RankingResult) -> RankingResult:
+        """Сохранение итогов поиска"""
+        self.session.add(result)
+        await self.session.commit()
+        return result
+
+
+class CRUDCrawlWatermark:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def ensure(self, shards: List[CrawlWatermark]) -> None:
+        """Регистрация запросов сборщика; существующие строки не меняются"""
+        if not shards:
+            return
+        stmt = insert(CrawlWatermark.__table__).values([
+            {"key": shard.key, "position": shard.position, "city": shard.city, "stored": 0}
+            for shard in shards
+        ])
+        await self.session.execute(stmt.on_conflict_do_nothing(index_elements=["key"]))
+        await self.session.commit()
+
+    async def acquire(
+        self,
+        keys: List[str],
+        owner: str,
+        lease_ttl: timedelta,
+        interval: timedelta
+    ) -> Optional[CrawlWatermark]:
+        """Аренда одного запроса, который пора обойти: без аренды (или с истёкшей)
+        и не обходившегося последние interval. Одним UPDATE ... RETURNING
+        с SKIP LOCKED — две реплики никогда не получат один и тот же запрос."""
+        if not keys:
+            return None
+        table = CrawlWatermark.__table__
+        now = datetime.utcnow()
+        due = (
+            select(table.c.key)
+            .where(table.c.key.in_(keys))
+            .where(or_(table.c.lease_until.is_(None), table.c.lease_until < now))
+            .where(or_(table.c.crawled_at.is_(None), table.c.crawled_at < now - interval))
+            .order_by(table.c.crawled_at.asc().nullsfirst())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            table.update()
+            .where(table.c.key == due)
+            .values(lease_owner=owner, lease_until=now + lease_ttl)
+            .returning(*table.c)
+        )
+        row = result.first()
+        await self.session.commit()
+        return CrawlWatermark(**row._mapping) if row else None
+
+    async def renew(self, key: str, owner: str, lease_ttl: timedelta) -> bool:
+        """Продление аренды; False, если её уже перехватила другая реплика"""
+        table = CrawlWatermark.__table__
+        result = await self.session.execute(
+            table.update()
+            .where(table.c.key == key, table.c.lease_owner == owner)
+            .values(lease_until=datetime.utcnow() + lease_ttl)
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def release(
+        self,
+        key: str,
+        owner: str,
+        *,
+        stored: int = 0,
+        watermark: Optional[datetime] = None,
+        backfill_to: Optional[datetime] = None,
+        backfill_watermark: Optional[datetime] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """Снятие аренды. Водяной знак, точка продолжения незавершённого прохода
+        (backfill_to, None — прохода нет) и время обхода меняются только после
+        успешного обхода, иначе следующий обход повторит его с прежней точки."""
+        table = CrawlWatermark.__table__
+        values: Dict[str, Any] = {
+            "lease_owner": None,
+            "lease_until": None,
+            "stored": table.c.stored + stored,
+            "last_error": error
+        }
+        if error is None:
+            values["crawled_at"] = datetime.utcnow()
+            values["backfill_to"] = backfill_to
+            values["backfill_watermark"] = backfill_watermark
+            if watermark is not None:
+                values["watermark"] = func.greatest(func.coalesce(table.c.watermark, watermark), watermark)
+        await self.session.execute(
+            table.update().where(table.c.key == key, table.c.lease_owner == owner).values(**values)
+        )
+        await self.session.commit()
+
+    async def get_multi(self, keys: List[str]) -> List[CrawlWatermark]:
+        """Состояние запросов сборщика"""
+        result = await self.session.execute(
+            select(CrawlWatermark).where(CrawlWatermark.key.in_(keys)).order_by(CrawlWatermark.key)
+        )
+        return result.scalars().all()
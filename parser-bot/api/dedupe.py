@@ -0,0 +1,291 @@
+# Поиск почти-дубликатов резюме по всему корпусу: MinHash + LSH
+import hashlib
+import logging
+import re
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Resume, ResumeSignature, Duplicate, DedupeResult
+from .utils import normalize_text
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORDS = re.compile(r"[\w+#]+")
+
+# Контакты почти однозначно указывают на человека — даём им больший вес
+CONTACT_WEIGHT = 4
+NAME_WEIGHT = 2
+
+
+def normalize_phone(value: Any) -> Optional[str]:
+    """Телефон в виде 7XXXXXXXXXX; принимает строку или объект телефона HH"""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get("formatted") or "".join(
+            str(value.get(part) or "") for part in ("country", "city", "number")
+        )
+    digits = re.sub(r"\D", "", str(value or ""))
+    if len(digits) == 11 and digits[0] == "8":
+        digits = "7" + digits[1:]
+    elif len(digits) == 10:
+        digits = "7" + digits
+    return digits if len(digits) >= 10 else None
+
+
+def normalize_email(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("value") or value.get("email")
+    value = normalize_text(value if isinstance(value, str) else None)
+    return value if "@" in value else None
+
+
+def normalize_name(fio: Optional[str]) -> List[str]:
+    """Слова ФИО без учёта порядка и регистра"""
+    return sorted(_WORDS.findall(normalize_text(fio)))
+
+
+def resume_features(resume: Any) -> Set[str]:
+    """Множество признаков резюме для MinHash (без источника — дубли ищем между HH и Avito)"""
+    features: Set[str] = set()
+    contacts = (resume.json_raw or {}).get("contacts") or {}
+
+    phone = normalize_phone(contacts.get("phone"))
+    email = normalize_email(contacts.get("email"))
+    for weight in range(CONTACT_WEIGHT):
+        if phone:
+            features.add(f"phone:{phone}#{weight}")
+        if email:
+            features.add(f"email:{email}#{weight}")
+
+    for word in normalize_name(resume.fio):
+        for weight in range(NAME_WEIGHT):
+            features.add(f"name:{word}#{weight}")
+
+    features.update(f"skill:{normalize_text(skill)}" for skill in resume.skills or [] if skill)
+    features.update(f"pos:{word}" for word in _WORDS.findall(normalize_text(resume.position)))
+    if resume.city:
+        features.add(f"city:{normalize_text(resume.city)}")
+    return features
+
+
+def _hash_feature(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHasher:
+    """MinHash-сигнатуры фиксированной длины и хэши LSH-полос (bands × rows = num_perm).
+
+    Порог похожести, начиная с которого пара почти наверняка попадёт
+    в кандидаты, примерно (1 / bands) ** (1 / rows)."""
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        # Множители полиномиального хэша полосы и соль номера полосы
+        self.band_weights = generator.randint(1, (1 << 61) - 1, size=self.rows, dtype=np.uint64)
+        self.band_salt = generator.randint(1, (1 << 61) - 1, size=bands, dtype=np.uint64)
+
+    def signatures(self, feature_sets: Sequence[Set[str]], chunk: int = 2000) -> np.ndarray:
+        """Сигнатуры для пачки множеств признаков: массив (n, num_perm) uint64"""
+        result = np.full((len(feature_sets), self.num_perm), _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(feature_sets), chunk):
+            part = feature_sets[start:start + chunk]
+            sizes = np.array([len(features) for features in part])
+            hashes = np.fromiter(
+                (_hash_feature(feature) for features in part for feature in features),
+                dtype=np.uint64,
+                count=int(sizes.sum())
+            )
+            if not len(hashes):
+                continue
+            # Переполнение uint64 здесь допустимо: нужна лишь семья хэш-функций
+            with np.errstate(over="ignore"):
+                permuted = ((hashes[:, None] * self.a + self.b) % _MERSENNE) & _MAX_HASH
+            non_empty = np.flatnonzero(sizes)
+            offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))[non_empty]
+            result[start + non_empty] = np.minimum.reduceat(permuted, offsets, axis=0)
+        return result
+
+    def band_hashes(self, signatures: np.ndarray) -> np.ndarray:
+        """Хэши полос: массив (n, bands) int64 (в таком виде хранятся в BIGINT[])"""
+        bands = signatures.reshape(len(signatures), self.bands, self.rows)
+        with np.errstate(over="ignore"):
+            hashed = (bands * self.band_weights).sum(axis=2, dtype=np.uint64) + self.band_salt
+        return hashed.view(np.int64)
+
+
+def estimate_similarity(left: Sequence[int], right: Sequence[int]) -> float:
+    """Оценка коэффициента Жаккара по двум сигнатурам"""
+    return float(np.mean(np.asarray(left) == np.asarray(right)))
+
+
+def candidate_pairs(
+    bands: Dict[Any, Iterable[int]],
+    only: Optional[Set[Any]] = None,
+    max_bucket: int = 500
+) -> Set[Tuple[Any, Any]]:
+    """Пары, совпавшие хотя бы в одной полосе. only — учитывать лишь пары,
+    где есть хотя бы один элемент из only (инкрементальный режим)."""
+    buckets: Dict[int, List[Any]] = defaultdict(list)
+    for key, band_values in bands.items():
+        for value in band_values:
+            buckets[value].append(key)
+
+    pairs: Set[Tuple[Any, Any]] = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        if len(members) > max_bucket:
+            # Огромная корзина — признак вырожденных признаков, а не дублей
+            logger.warning(f"Пропущена LSH-корзина из {len(members)} резюме")
+            continue
+        for i, left in enumerate(members):
+            for right in members[i + 1:]:
+                if only is not None and left not in only and right not in only:
+                    continue
+                pairs.add((left, right) if str(left) < str(right) else (right, left))
+    return pairs
+
+
+class DedupeEngine:
+    """Пакетный поиск дублей: сигнатуры хранятся в resumesignature,
+    найденные пары пишутся в duplicate (orig — более раннее резюме)"""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        hasher: Optional[MinHasher] = None,
+        threshold: float = 0.7,
+        batch_size: int = 1000
+    ):
+        self.session = session
+        self.hasher = hasher or MinHasher()
+        self.threshold = threshold
+        self.batch_size = batch_size
+
+    async def sign_new(self) -> Set[UUID]:
+        """Сигнатуры для новых и изменившихся с прошлого расчёта резюме; возвращает их ID"""
+        signed: Set[UUID] = set()
+        # Из json_raw нужны только контакты — остальное не передаём из базы
+        contacts = func.jsonb_build_object("contacts", Resume.json_raw["contacts"]).label("json_raw")
+        while True:
+            result = await self.session.execute(
+                select(Resume.id, Resume.fio, Resume.position, Resume.city, Resume.skills, Resume.updated_at, contacts)
+                .outerjoin(ResumeSignature, ResumeSignature.resume_id == Resume.id)
+                .where(or_(
+                    ResumeSignature.resume_id.is_(None),
+                    ResumeSignature.computed_at < Resume.updated_at
+                ))
+                .limit(self.batch_size)
+            )
+            resumes = result.all()
+            if not resumes:
+                return signed
+
+            features = [resume_features(resume) for resume in resumes]
+            signatures = self.hasher.signatures(features)
+            bands = self.hasher.band_hashes(signatures)
+            now = datetime.utcnow()
+            stmt = insert(ResumeSignature.__table__).values([
+                {
+                    "resume_id": resume.id,
+                    "signature": signatures[i].astype(np.int64).tolist(),
+                    # Резюме без признаков ни с чем не сравниваем
+                    "bands": bands[i].tolist() if features[i] else [],
+                    "computed_at": max(now, resume.updated_at)
+                }
+                for i, resume in enumerate(resumes)
+            ])
+            await self.session.execute(stmt.on_conflict_do_update(
+                index_elements=["resume_id"],
+                set_={
+                    "signature": stmt.excluded.signature,
+                    "bands": stmt.excluded.bands,
+                    "computed_at": stmt.excluded.computed_at
+                }
+            ))
+            await self.session.commit()
+            signed.update(resume.id for resume in resumes)
+
+    async def _load_signatures(self, ids: Optional[Set[UUID]] = None) -> Dict[UUID, Tuple[np.ndarray, List[int], datetime]]:
+        """Сигнатуры всего корпуса или кандидатов, делящих полосу с ids"""
+        query = (
+            select(ResumeSignature.resume_id, ResumeSignature.signature, ResumeSignature.bands, Resume.created_at)
+            .join(Resume, Resume.id == ResumeSignature.resume_id)
+        )
+        loaded = {}
+        if ids is None:
+            result = await self.session.stream(query.execution_options(yield_per=self.batch_size))
+            async for row in result:
+                loaded[row.resume_id] = (np.array(row.signature, dtype=np.int64), row.bands, row.created_at)
+            return loaded
+
+        id_list = list(ids)
+        for start in range(0, len(id_list), self.batch_size):
+            chunk = id_list[start:start + self.batch_size]
+            own = await self.session.execute(
+                select(ResumeSignature.bands).where(ResumeSignature.resume_id.in_(chunk))
+            )
+            band_values = list({value for (values,) in own for value in values})
+            if not band_values:
+                continue
+            # GIN-индекс по bands: только резюме с общей полосой
+            result = await self.session.execute(query.where(ResumeSignature.bands.overlap(band_values)))
+            for row in result:
+                loaded[row.resume_id] = (np.array(row.signature, dtype=np.int64), row.bands, row.created_at)
+        return loaded
+
+    async def run(self, incremental: bool = True) -> DedupeResult:
+        """Поиск дублей. В инкрементальном режиме сравниваются только новые
+        и изменившиеся резюме — между собой и с остальным корпусом."""
+        signed = await self.sign_new()
+        if incremental and not signed:
+            return DedupeResult()
+
+        loaded = await self._load_signatures(signed if incremental else None)
+        pairs = candidate_pairs(
+            {resume_id: bands for resume_id, (_, bands, _) in loaded.items()},
+            only=signed if incremental else None
+        )
+
+        duplicates = []
+        for left, right in pairs:
+            score = estimate_similarity(loaded[left][0], loaded[right][0])
+            if score < self.threshold:
+                continue
+            orig, dup = sorted((left, right), key=lambda resume_id: (loaded[resume_id][2], str(resume_id)))
+            duplicates.append({"orig": orig, "dup": dup, "score": score})
+
+        written = 0
+        for start in range(0, len(duplicates), self.batch_size):
+            batch = duplicates[start:start + self.batch_size]
+            now = datetime.utcnow()
+            result = await self.session.execute(
+                insert(Duplicate.__table__)
+                .values([{**pair, "id": uuid.uuid4(), "created_at": now} for pair in batch])
+                .on_conflict_do_nothing(constraint="uq_duplicate_pair")
+                .returning(Duplicate.__table__.c.id)
+            )
+            written += len(result.all())
+            await self.session.commit()
+
+        logger.info(f"Дедупликация: подписано {len(signed)}, кандидатов {len(pairs)}, новых дублей {written}")
+        return DedupeResult(signed=len(signed), candidate_pairs=len(pairs), duplicates=written)
+
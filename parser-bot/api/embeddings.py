@@ -0,0 +1,78 @@
+# Эмбеддинги резюме и вакансий для семантического поиска (pgvector)
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from typing import List, Sequence
+
+import numpy as np
+import openai
+
+from .models import EMBEDDING_DIM
+from .prerank import tokenize
+
+
+class Embedder(ABC):
+    """Интерфейс: тексты → матрица (len(texts), dim) с нормой 1 у каждой строки"""
+
+    dim: int = EMBEDDING_DIM
+
+    @abstractmethod
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Эмбеддинги текстов в порядке входа"""
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class HashingEmbedder(Embedder):
+    """Детерминированный локальный эмбеддер: хэширование токенов и биграмм
+    со знаком в dim корзин. Без сети и моделей — для тестов и бенчмарков."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _bucket(self, feature: str) -> tuple:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            for feature in [*tokens, *(" ".join(pair) for pair in zip(tokens, tokens[1:]))]:
+                index, sign = self._bucket(feature)
+                vectors[row, index] += sign
+        return l2_normalize(vectors)
+
+
+class OpenAIEmbedder(Embedder):
+    """Эмбеддинги OpenAI; модели text-embedding-3-* укорачиваются до dim"""
+
+    def __init__(self, model: str = "text-embedding-3-small", dim: int = EMBEDDING_DIM, batch_size: int = 256):
+        self.model = model
+        self.dim = dim
+        self.batch_size = batch_size
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            response = await openai.Embedding.acreate(
+                model=self.model,
+                input=list(texts[start:start + self.batch_size]),
+                dimensions=self.dim
+            )
+            vectors.extend(item["embedding"] for item in sorted(response["data"], key=lambda item: item["index"]))
+        return l2_normalize(np.array(vectors, dtype=np.float32).reshape(len(texts), self.dim))
+
+
+def get_embedder() -> Embedder:
+    """Эмбеддер из переменной окружения EMBEDDER: hashing (по умолчанию) или openai"""
+    kind = os.getenv("EMBEDDER", "hashing")
+    if kind == "openai":
+        return OpenAIEmbedder(model=os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"))
+    if kind == "hashing":
+        return HashingEmbedder()
+    raise ValueError(f"Неизвестный эмбеддер: {kind}")
@@ -0,0 +1,71 @@
+# Потоковая выгрузка резюме в NDJSON и CSV
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict
+from pydantic.json import pydantic_encoder
+from sqlalchemy.engine import Row
+
+EXPORT_FIELDS = [
+    "id", "source", "source_id", "fio", "city", "experience_years", "position",
+    "skills", "salary_expect", "published_at", "created_at", "updated_at"
+]
+
+# Размер куска ответа: достаточно крупный для сети, но память не растёт с объёмом выгрузки
+CHUNK_SIZE = 64 * 1024
+
+
+def resume_row(resume: Row, include_raw: bool = False) -> Dict[str, Any]:
+    row = {field: getattr(resume, field) for field in EXPORT_FIELDS}
+    if include_raw:
+        row["json_raw"] = resume.json_raw
+    return row
+
+
+async def iter_ndjson(resumes: AsyncIterator[Row], include_raw: bool = True) -> AsyncIterator[bytes]:
+    """NDJSON: одно резюме — одна строка"""
+    buffer = []
+    size = 0
+    async for resume in resumes:
+        line = json.dumps(resume_row(resume, include_raw), ensure_ascii=False, default=pydantic_encoder)
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ("\n".join(buffer) + "\n").encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode("utf-8")
+
+
+async def iter_csv(resumes: AsyncIterator[Row]) -> AsyncIterator[bytes]:
+    """CSV с заголовком; навыки через «; », без json_raw"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_FIELDS)
+    # Заголовок отдаём сразу, чтобы клиент начал получать данные
+    yield output.getvalue().encode("utf-8")
+    output.seek(0)
+    output.truncate()
+
+    async for resume in resumes:
+        row = resume_row(resume)
+        row["skills"] = "; ".join(row["skills"] or [])
+        writer.writerow(["" if row[field] is None else row[field] for field in EXPORT_FIELDS])
+        if output.tell() >= CHUNK_SIZE:
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate()
+
+    if output.tell():
+        yield output.getvalue().encode("utf-8")
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Потоковое gzip-сжатие кусков ответа"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
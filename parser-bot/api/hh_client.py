@@ -1,12 +1,18 @@
 # Клиент HH API
 import httpx
 import asyncio
-from typing import List, Optional, Dict, Any
+import itertools
+import orjson
+from collections import deque
+from typing import List, Optional, Dict, Any, AsyncIterator, Set
 from datetime import datetime, timedelta
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 import logging
 from .models import ResumeCreate
-from .utils import rate_limit
+from .utils import TokenBucket, backoff_delay, parse_hh_datetime
+from .areas import AreaIndex
+from .cache import ResponseCache
+from .sources import HarvestStats, KnownVersions, ResumeSource
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
@@ -17,7 +23,7 @@ class HHVacancyArea(BaseModel):
     name: str
 
 class HHSalary(BaseModel):
-    from_: Optional[int] = None
+    from_: Optional[int] = Field(None, alias="from")
     to: Optional[int] = None
     currency: Optional[str] = None
     gross: Optional[bool] = None
@@ -37,65 +43,304 @@ class HHResume(BaseModel):
     education: List[Dict[str, Any]]
     total_experience: Optional[Dict[str, Any]] = None
 
-class HHClient:
-    def __init__(self, client_id: str, client_secret: str):
-        self.base_url = "https://api.hh.ru"
+class HHSearchPage(BaseModel):
+    """Страница выдачи поиска и общее число найденных резюме. Элементы —
+    словари из ответа как есть (проверка моделью: HHResume.parse_obj)"""
+    items: List[Dict[str, Any]]
+    found: int = 0
+    pages: int = 0
+
+# Градации опыта в фильтре experience поиска HH
+EXPERIENCE_BUCKETS = ("noExperience", "between1And3", "between3And6", "moreThan6")
+# Окно по времени публикации уже не делится, если оно короче
+MIN_WINDOW = timedelta(hours=1)
+
+class SearchPartition(BaseModel):
+    """Часть поискового запроса: регион и, после деления, опыт и окно публикации (UTC)"""
+    area: str
+    experience: Optional[str] = None
+    period: int = 30  # дней; без date_from
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    by_area: bool = True  # False — по подрегионам не делить (см. split)
+
+    def params(self) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"area": self.area}
+        if self.experience:
+            params["experience"] = self.experience
+        if self.date_from:
+            params["date_from"] = self.date_from.isoformat(timespec="seconds") + "+00:00"
+        else:
+            params["period"] = self.period
+        if self.date_to:
+            params["date_to"] = self.date_to.isoformat(timespec="seconds") + "+00:00"
+        return params
+
+    def split(self, areas: AreaIndex) -> List["SearchPartition"]:
+        """Непересекающиеся части: сначала подрегионы, затем градации опыта,
+        затем половины окна публикации. Пусто — делить дальше нечем.
+        Резюме, привязанные к самому родительскому региону, в подрегионы
+        не попадают: если найденного в них меньше, чем в регионе, его делят
+        с by_area=False — по опыту и времени, без потерь."""
+        children = areas.children(self.area) if self.by_area else []
+        if children:
+            return [self.copy(update={"area": child}) for child in children]
+        if self.experience is None:
+            return [self.copy(update={"experience": bucket}) for bucket in EXPERIENCE_BUCKETS]
+
+        date_to = self.date_to or datetime.utcnow()
+        date_from = self.date_from or date_to - timedelta(days=self.period)
+        if date_to - date_from <= MIN_WINDOW:
+            return []
+        middle = date_from + (date_to - date_from) / 2
+        return [
+            self.copy(update={"date_from": date_from, "date_to": middle}),
+            self.copy(update={"date_from": middle, "date_to": date_to})
+        ]
+
+def hh_skills(data: Dict[str, Any]) -> List[str]:
+    """Навыки: skill_set (строки) или skills ([{"name": ...}])"""
+    skill_set = data.get("skill_set")
+    if skill_set:
+        return [skill for skill in skill_set if isinstance(skill, str)]
+    skills = data.get("skills")
+    if not isinstance(skills, list):
+        return []
+    return [skill["name"] for skill in skills if isinstance(skill, dict) and skill.get("name")]
+
+def hh_contacts(contacts: Any) -> Dict[str, Optional[str]]:
+    """Почта и телефон: словарь {"email", "phone"} или список контактов HH с type.id"""
+    if isinstance(contacts, dict):
+        return {"email": contacts.get("email"), "phone": contacts.get("phone")}
+    result: Dict[str, Optional[str]] = {"email": None, "phone": None}
+    for contact in contacts if isinstance(contacts, list) else []:
+        kind = (contact.get("type") or {}).get("id")
+        value = contact.get("value")
+        if isinstance(value, dict):
+            value = value.get("formatted")
+        if kind == "email" and not result["email"]:
+            result["email"] = value
+        elif kind in ("cell", "home", "work") and not result["phone"]:
+            result["phone"] = value
+    return result
+
+def resume_from_hh(data: Dict[str, Any]) -> ResumeCreate:
+    """ResumeCreate прямо из ответа /resumes/{id}: нужные поля берутся из
+    словаря, сам ответ сохраняется в json_raw["hh_data"] без изменений"""
+    title = data.get("title") or ""
+    months = (data.get("total_experience") or {}).get("months") or 0
+    salary = data.get("salary") or {}
+    return ResumeCreate(
+        source="hh",
+        source_id=str(data["id"]),
+        fio=title[:100],
+        city=((data.get("area") or {}).get("name") or "")[:50] or None,
+        experience_years=round(months / 12, 1),
+        position=title.split(",")[0].strip()[:100],
+        skills=hh_skills(data),
+        salary_expect=salary.get("amount") or salary.get("to") or salary.get("from"),
+        published_at=parse_hh_datetime(data["updated_at"]),
+        json_raw={
+            "hh_data": data,
+            "contacts": hh_contacts(data.get("contacts"))
+        }
+    )
+
+class HHClient(ResumeSource):
+    name = "hh"
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        *,
+        base_url: str = "https://api.hh.ru",
+        max_connections: int = 20,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        requests_per_second: float = 20,
+        burst: Optional[float] = None,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        areas_ttl: float = 24 * 3600,
+        areas_cache_path: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        max_depth: int = 2000,
+        page_prefetch: int = 4
+    ):
+        self.base_url = base_url.rstrip("/")
         self.client_id = client_id
         self.client_secret = client_secret
         self.access_token: Optional[str] = None
         self.token_expires: Optional[datetime] = None
-        self.rate_limit_semaphore = asyncio.Semaphore(20)  # 20 запросов в секунду (лимит HH)
+        self.rate_limit_semaphore = asyncio.Semaphore(20)  # не более 20 запросов одновременно
+        self.rate_limiter = TokenBucket(requests_per_second, burst)  # 20 запросов в секунду (лимит HH)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.stats = {"requests": 0, "retries": 0, "backoff_seconds": 0.0}
+
+        # Индекс регионов строится один раз и обновляется по TTL
+        self.area_index = AreaIndex(ttl=areas_ttl, path=areas_cache_path)
+        self._areas_lock = asyncio.Lock()
+
+        # Кэш страниц поиска и деталей резюме (None — без кэша)
+        self.cache = cache
+
+        # HH отдаёт не больше max_depth результатов одного запроса — более широкие делятся
+        self.max_depth = max_depth
+        # Сколько следующих страниц одной части запрашивать заранее
+        self.page_prefetch = page_prefetch
+
+        # Параметры общего пула соединений
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def startup(self) -> None:
+        """Создание общего HTTP-клиента (вызывается при старте приложения)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self.transport,
+                headers={"User-Agent": "MVP-Parser-Bot/1.0 (likesme77@example.com)"}
+            )
+
+    async def shutdown(self) -> None:
+        """Закрытие общего HTTP-клиента и всех соединений пула"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Общий клиент; создаётся лениво, если startup() не вызывали"""
+        if self._client is None or self._client.is_closed:
+            await self.startup()
+        return self._client
 
     async def _get_access_token(self) -> str:
         """Получение OAuth токена для доступа к API"""
         if self.access_token and self.token_expires and datetime.now() < self.token_expires:
             return self.access_token
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/oauth/token",
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
+        client = await self._get_client()
+        response = await client.post(
+            "/oauth/token",
+            data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret
+            },
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
 
-            if response.status_code != 200:
-                logger.error(f"Ошибка получения токена: {response.text}")
-                raise Exception("Не удалось получить токен доступа")
+        if response.status_code != 200:
+            logger.error(f"Ошибка получения токена: {response.text}")
+            raise Exception("Не удалось получить токен доступа")
 
-            data = response.json()
-            self.access_token = data["access_token"]
-            self.token_expires = datetime.now() + timedelta(seconds=data["expires_in"])
-            return self.access_token
+        data = response.json()
+        self.access_token = data["access_token"]
+        self.token_expires = datetime.now() + timedelta(seconds=data["expires_in"])
+        return self.access_token
 
-    @rate_limit(20)  # Ограничение 20 запросов в секунду
-    async def _make_request(self, endpoint: str, params: Optional[dict] = None) -> Dict[str, Any]:
-        """Базовый метод для выполнения запросов к API HH"""
-        token = await self._get_access_token()
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "User-Agent": "MVP-Parser-Bot/1.0 (likesme77@example.com)"
-        }
+    async def _send(
+        self,
+        endpoint: str,
+        params: Optional[dict] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """GET-запрос к API HH с учётом лимитов и повторами при 429"""
+        client = await self._get_client()
 
-        async with self.rate_limit_semaphore:
-            async with httpx.AsyncClient() as client:
+        for attempt in range(self.max_retries + 1):
+            token = await self._get_access_token()
+            await self.rate_limiter.acquire()
+
+            async with self.rate_limit_semaphore:
+                self.stats["requests"] += 1
                 response = await client.get(
-                    f"{self.base_url}{endpoint}",
+                    endpoint,
                     params=params,
-                    headers=headers,
-                    timeout=30.0
+                    headers={**(headers or {}), "Authorization": f"Bearer {token}"}
                 )
 
-                if response.status_code == 429:
-                    logger.warning("Превышен лимит запросов, ожидание...")
-                    await asyncio.sleep(1)
-                    return await self._make_request(endpoint, params)
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+
+            # Притормаживаем весь клиент, а не только текущий запрос
+            delay = backoff_delay(
+                attempt,
+                base=self.backoff_base,
+                cap=self.backoff_cap,
+                retry_after=response.headers.get("Retry-After")
+            )
+            self.rate_limiter.pause(delay)
+            self.stats["retries"] += 1
+            self.stats["backoff_seconds"] += delay
+            logger.warning(f"Превышен лимит запросов, повтор {attempt + 1} через {delay:.2f} с")
+
+        return response
+
+    async def _make_request(self, endpoint: str, params: Optional[dict] = None) -> Dict[str, Any]:
+        """Базовый метод для выполнения запросов к API HH"""
+        response = await self._send(endpoint, params)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    async def _cached_request(self, endpoint: str, params: Optional[dict] = None) -> Dict[str, Any]:
+        """Запрос через кэш: свежая запись отдаётся без обращения к API,
+        устаревшая перепроверяется условным запросом (ETag/Last-Modified)"""
+        if self.cache is None:
+            return await self._make_request(endpoint, params)
 
-                response.raise_for_status()
-                return response.json()
+        entry = await self.cache.get(endpoint, params)
+        if entry and entry.fresh:
+            return entry.data
+
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        response = await self._send(endpoint, params, headers)
+        if response.status_code == 304 and entry:
+            await self.cache.revalidate(endpoint, params, entry)
+            return entry.data
+
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        await self.cache.set(
+            endpoint,
+            params,
+            data,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
+        return data
+
+    def metrics(self) -> Dict[str, Any]:
+        """Счётчики запросов, повторов и времени ожидания лимитов"""
+        return {
+            **self.stats,
+            "backoff_seconds": round(self.stats["backoff_seconds"], 3),
+            "rate_limiter": self.rate_limiter.metrics(),
+            "cache": self.cache.metrics() if self.cache else None
+        }
 
     async def search_resumes(
         self,
@@ -107,135 +352,404 @@ class HHClient:
         page: int = 0
     ) -> List[HHResume]:
         """Поиск резюме по параметрам"""
+        partition = SearchPartition(area=area, experience=experience, period=period)
+        try:
+            result = await self.search_page(position, partition, page, per_page)
+            return [HHResume.parse_obj(item) for item in result.items]
+        except Exception as e:
+            logger.error(f"Ошибка поиска резюме: {e}")
+            return []
+
+    async def search_page(
+        self,
+        position: str,
+        partition: SearchPartition,
+        page: int = 0,
+        per_page: int = 100
+    ) -> HHSearchPage:
+        """Страница выдачи по части запроса, от новых резюме к старым"""
         params = {
             "text": position,
-            "area": area,
-            "period": period,
+            **partition.params(),
             "per_page": per_page,
             "page": page,
             "order_by": "publication_time"
         }
+        data = await self._cached_request("/resumes", params)
+        # Без валидации: сборщику нужны только id и updated_at
+        return HHSearchPage.construct(
+            items=data.get("items") or [],
+            found=data.get("found", 0),
+            pages=data.get("pages", 0)
+        )
+
+    async def iter_search_pages(
+        self,
+        position: str,
+        partition: SearchPartition,
+        *,
+        per_page: int = 100,
+        newer_than: Optional[datetime] = None,
+        stats: Optional[HarvestStats] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Страницы выдачи без повторов резюме. Если найдено больше, чем HH
+        отдаёт одним запросом (max_depth), запрос рекурсивно делится
+        (SearchPartition.split) и части обходятся параллельно под общим
+        лимитом запросов клиента. С newer_than обход каждой части
+        останавливается на первом более старом резюме.
+
+        Каждая часть идёт от новых резюме к старым, поэтому по страницам,
+        которые читатель обработал целиком (вернулся за следующей), видно,
+        новее какой даты он прошёл все части: она попадает в
+        stats.covered_to, если выдача пройдена не до конца."""
+        stats = stats if stats is not None else HarvestStats()
+        areas = await self._get_area_index()
+        max_pages = -(-self.max_depth // per_page)
+        done = object()
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.page_prefetch)
+        seen: Set[str] = set()
+        # Часть → читатель обработал все её резюме новее этой даты (datetime.max — ещё ни одного);
+        # законченные части удаляются, у частей со сбоем страницы граница больше не сдвигается
+        keys = itertools.count()
+        frontiers: Dict[int, datetime] = {}
+        stuck: Set[int] = set()
+
+        def register(part: SearchPartition) -> int:
+            key = next(keys)
+            frontiers[key] = part.date_to or datetime.max
+            return key
+
+        async def emit(key: int, items: List[Dict[str, Any]]) -> bool:
+            """Отдаёт новые резюме страницы; False — дальше в этой части только старые"""
+            fresh = []
+            oldest = None
+            for item in items:
+                updated_at = parse_hh_datetime(item["updated_at"])
+                if stats.newest is None or updated_at > stats.newest:
+                    stats.newest = updated_at
+                if oldest is None or updated_at < oldest:
+                    oldest = updated_at
+                if newer_than is None or updated_at > newer_than:
+                    fresh.append(item)
+            # Соседние окна публикации делят границу — повторы отбрасываем
+            unique = [item for item in fresh if item["id"] not in seen]
+            seen.update(item["id"] for item in unique)
+            if items:
+                # Страница без новых резюме тоже сдвигает границу части
+                await pages.put((key, unique, oldest))
+            return len(fresh) == len(items) and len(items) == per_page
+
+        async def fetch(key: int, part: SearchPartition, page: int) -> Optional[HHSearchPage]:
+            try:
+                return await self.search_page(position, part, page, per_page)
+            except Exception as e:
+                stats.failed_pages += 1
+                stuck.add(key)
+                logger.error(f"Ошибка поиска резюме ({part.params()}, страница {page}): {e}")
+                return None
+
+        async def crawl(key: int, part: SearchPartition, first: Optional[HHSearchPage] = None) -> None:
+            if first is None:
+                first = await fetch(key, part, 0)
+                if first is None:
+                    return
+            truncated = False
+            if first.found > self.max_depth:
+                parts = part.split(areas)
+                # Родительская часть страниц не отдавала — её границу заменяют границы частей
+                part_keys = [register(child) for child in parts]
+                firsts: List[Optional[HHSearchPage]] = [None] * len(parts)
+                if parts and parts[0].area != part.area:
+                    # Резюме самого региона в подрегионы не попадают — сверяем найденное
+                    firsts = await asyncio.gather(*(fetch(k, child, 0) for k, child in zip(part_keys, parts)))
+                    if all(page is not None for page in firsts) and sum(page.found for page in firsts) < first.found:
+                        logger.info(
+                            f"Запрос {part.params()}: в подрегионах найдено {sum(page.found for page in firsts)} "
+                            f"из {first.found}, делим по опыту и времени"
+                        )
+                        for k in part_keys:
+                            del frontiers[k]
+                        parts = part.copy(update={"by_area": False}).split(areas)
+                        part_keys = [register(child) for child in parts]
+                        firsts = [None] * len(parts)
+                if parts:
+                    stats.partitions += len(parts)
+                    del frontiers[key]
+                    await asyncio.gather(*(crawl(*child) for child in zip(part_keys, parts, firsts)))
+                    return
+                stats.truncated += 1
+                truncated = True
+                logger.warning(f"Запрос {part.params()}: найдено {first.found}, доступны первые {self.max_depth}")
+
+            if await emit(key, first.items):
+                # Остальные страницы части — с опережением на page_prefetch запросов
+                last_page = min(first.pages, max_pages)
+                next_page = 1
+                window: deque = deque()
+                try:
+                    while window or next_page < last_page:
+                        while next_page < last_page and len(window) < self.page_prefetch:
+                            window.append(asyncio.create_task(fetch(key, part, next_page)))
+                            next_page += 1
+                        result = await window.popleft()
+                        if result is not None and not await emit(key, result.items):
+                            break
+                finally:
+                    for task in window:
+                        task.cancel()
+            if not truncated:
+                # Часть пройдена до конца (резюме глубже max_depth недоступны — не пройдена)
+                await pages.put((key, None, None))
 
-        if experience:
-            params["experience"] = experience
+        async def run() -> None:
+            try:
+                await crawl(register(partition), partition)
+            except asyncio.CancelledError:
+                # Читателя уже нет, а очередь может быть полной — done не кладём
+                raise
+            except Exception:
+                await pages.put(done)
+                raise
+            await pages.put(done)
 
+        runner = asyncio.create_task(run())
         try:
-            data = await self._make_request("/resumes", params)
-            return [HHResume(**item) for item in data.get("items", [])]
+            while True:
+                entry = await pages.get()
+                if entry is done:
+                    break
+                key, items, oldest = entry
+                if items:
+                    yield items
+                # Читатель вернулся за следующей страницей — эту он обработал целиком
+                if key in stuck:
+                    continue
+                if items is None:
+                    del frontiers[key]
+                else:
+                    frontiers[key] = min(frontiers[key], oldest)
+            await runner
+        finally:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+            # Все части новее covered_to пройдены; datetime.max — не пройдено ничего
+            covered_to = max(frontiers.values(), default=None)
+            stats.covered_to = covered_to if covered_to != datetime.max else None
+
+    async def get_resume_raw(self, resume_id: str) -> Optional[Dict[str, Any]]:
+        """Полное резюме — ответ HH как есть"""
+        try:
+            return await self._cached_request(f"/resumes/{resume_id}")
         except Exception as e:
-            logger.error(f"Ошибка поиска резюме: {e}")
-            return []
+            logger.error(f"Ошибка получения резюме {resume_id}: {e}")
+            return None
 
     async def get_resume_details(self, resume_id: str) -> Optional[HHResume]:
-        """Получение полной информации о резюме"""
+        """Получение полной информации о резюме (с проверкой моделью)"""
+        data = await self.get_resume_raw(resume_id)
+        if data is None:
+            return None
         try:
-            data = await self._make_request(f"/resumes/{resume_id}")
-            return HHResume(**data)
+            return HHResume.parse_obj(data)
         except Exception as e:
-            logger.error(f"Ошибка получения резюме {resume_id}: {e}")
+            logger.error(f"Ошибка разбора резюме {resume_id}: {e}")
             return None
 
     async def fetch_resumes_from_hh(
         self,
         position: str,
         city: str = "Москва",
-        limit: int = 1000
+        limit: int = 1000,
+        concurrency: int = 10,
+        known_versions: Optional[KnownVersions] = None,
+        stats: Optional[HarvestStats] = None,
+        newer_than: Optional[datetime] = None
     ) -> List[ResumeCreate]:
         """Основной метод для получения резюме из HH и преобразования в нашу модель"""
+        return [
+            resume async for resume in self.iter_resumes_from_hh(
+                position,
+                city,
+                limit=limit,
+                concurrency=concurrency,
+                known_versions=known_versions,
+                stats=stats,
+                newer_than=newer_than
+            )
+        ]
+
+    def iter_resumes(
+        self,
+        position: str,
+        city: str,
+        *,
+        limit: int = 1000,
+        known_versions: Optional[KnownVersions] = None,
+        stats: Optional[HarvestStats] = None,
+        newer_than: Optional[datetime] = None
+    ) -> AsyncIterator[ResumeCreate]:
+        """ResumeSource: см. iter_resumes_from_hh"""
+        return self.iter_resumes_from_hh(
+            position, city, limit=limit, known_versions=known_versions, stats=stats, newer_than=newer_than
+        )
+
+    async def iter_resumes_from_hh(
+        self,
+        position: str,
+        city: str = "Москва",
+        limit: Optional[int] = 1000,
+        concurrency: int = 10,
+        known_versions: Optional[KnownVersions] = None,
+        stats: Optional[HarvestStats] = None,
+        newer_than: Optional[datetime] = None,
+        older_than: Optional[datetime] = None,
+        fetch_limit: Optional[int] = None
+    ) -> AsyncIterator[ResumeCreate]:
+        """Потоковое получение резюме: пока детали текущей страницы загружаются
+        параллельно (не более concurrency одновременно), следующие страницы
+        поиска уже запрашиваются; широкие запросы делятся на части
+        (iter_search_pages). Резюме отдаются по мере готовности.
+
+        Если передан known_versions, детали запрашиваются только для новых
+        и изменившихся резюме; ID пропущенных попадают в stats.skipped_ids.
+
+        limit ограничивает число просмотренных резюме выдачи (None — без
+        ограничения), fetch_limit — только запросы деталей: пропущенные
+        неизменившиеся резюме в него не входят.
+
+        С newer_than (UTC) берутся только резюме, обновлённые позже: он же
+        передаётся в поиск как date_from, а обход страниц останавливается
+        на первом более старом резюме. С older_than (date_to) — только
+        обновлённые не позже."""
+        stats = stats if stats is not None else HarvestStats()
         # Сначала получаем ID региона по названию города
         area_id = await self._get_area_id(city)
         if not area_id:
             logger.warning(f"Не найден регион для города {city}")
-            return []
+            return
 
-        resumes = []
-        page = 0
-        total_fetched = 0
+        per_page = min(100, limit) if limit is not None else 100
+        done = object()
+        # Ограниченная очередь не даёт поиску убегать далеко вперёд деталей
+        pending: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue()
+        # Даты обновления резюме, детали которых не удалось получить
+        failed: List[datetime] = []
 
-        while total_fetched < limit:
-            hh_resumes = await self.search_resumes(
-                position=position,
-                area=area_id,
-                per_page=min(100, limit - total_fetched),
-                page=page
+        async def produce() -> None:
+            listed = queued = 0
+            listing = self.iter_search_pages(
+                position,
+                SearchPartition(area=area_id, date_from=newer_than, date_to=older_than),
+                per_page=per_page,
+                newer_than=newer_than,
+                stats=stats
             )
+            try:
+                async for items in listing:
+                    if limit is not None:
+                        if len(items) > limit - listed:
+                            stats.limited = True
+                        items = items[:limit - listed]
+                    listed += len(items)
 
-            if not hh_resumes:
-                break
+                    # Одним запросом узнаём, какие резюме уже есть в базе и не менялись
+                    known = {}
+                    if known_versions is not None:
+                        known = await known_versions([item["id"] for item in items])
 
-            for hh_resume in hh_resumes:
-                resume = await self._convert_hh_resume(hh_resume)
+                    for item in items:
+                        stored_at = known.get(item["id"])
+                        if stored_at and stored_at >= parse_hh_datetime(item["updated_at"]):
+                            stats.skipped_ids.append(item["id"])
+                        elif fetch_limit is None or queued < fetch_limit:
+                            await pending.put(item)
+                            queued += 1
+                        else:
+                            stats.limited = True
+                            break
+                        stats.found += 1
+                    if limit is not None and listed >= limit:
+                        stats.limited = True
+                    if stats.limited:
+                        # Дальше в выдаче могут быть резюме, до которых обход не дошёл
+                        break
+            finally:
+                await listing.aclose()
+
+            for _ in range(concurrency):
+                await pending.put(done)
+
+        async def consume() -> None:
+            while True:
+                item = await pending.get()
+                if item is done:
+                    return
+                stats.details_fetched += 1
+                data = await self.get_resume_raw(item["id"])
+                if data is None:
+                    stats.failed_details += 1
+                    failed.append(parse_hh_datetime(item["updated_at"]))
+                    continue
+                resume = self._convert_hh_resume(data)
                 if resume:
-                    resumes.append(resume)
-                    total_fetched += 1
+                    results.put_nowait(resume)
 
-            page += 1
-            if len(hh_resumes) < 100 or total_fetched >= limit:
-                break
+        async def run() -> None:
+            tasks = [asyncio.create_task(produce())]
+            tasks += [asyncio.create_task(consume()) for _ in range(concurrency)]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # Упавший поиск не должен оставить потребителей ждать очередь вечно
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                # Пройденной считается только часть выдачи новее всех несохранённых резюме
+                if failed and stats.covered_to is not None:
+                    stats.covered_to = max(stats.covered_to, *failed)
+                results.put_nowait(done)
 
-        return resumes
+        runner = asyncio.create_task(run())
+        try:
+            while True:
+                resume = await results.get()
+                if resume is done:
+                    break
+                yield resume
+            # Пробрасываем исключения из конвейера, если они были
+            await runner
+        finally:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+    async def _get_area_index(self) -> AreaIndex:
+        """Индекс регионов: из памяти, с диска или (если устарел) из /areas"""
+        index = self.area_index
+        if not index.is_stale:
+            return index
+
+        async with self._areas_lock:
+            if index.is_stale and not index.by_name:
+                index.load()
+            if index.is_stale:
+                try:
+                    index.build(await self._make_request("/areas"))
+                    index.save()
+                except Exception as e:
+                    # Устаревший индекс лучше, чем никакого
+                    logger.error(f"Ошибка обновления справочника регионов: {e}")
+        return index
 
     async def _get_area_id(self, city_name: str) -> Optional[str]:
         """Получение ID региона по названию города"""
-        try:
-            areas = await self._make_request("/areas")
-            for country in areas:
-                for area in country["areas"]:
-                    if area["name"].lower() == city_name.lower():
-                        return area["id"]
-                    for sub_area in area.get("areas", []):
-                        if sub_area["name"].lower() == city_name.lower():
-                            return sub_area["id"]
-            return None
-        except Exception as e:
-            logger.error(f"Ошибка поиска региона: {e}")
-            return None
+        index = await self._get_area_index()
+        return index.get(city_name)
 
-    async def _convert_hh_resume(self, hh_resume: HHResume) -> Optional[ResumeCreate]:
-        """Преобразование резюме из формата HH в нашу модель"""
+    def _convert_hh_resume(self, data: Dict[str, Any]) -> Optional[ResumeCreate]:
+        """Преобразование полного резюме из формата HH в нашу модель"""
         try:
-            # Получаем полную информацию о резюме
-            full_resume = await self.get_resume_details(hh_resume.id)
-            if not full_resume:
-                return None
-
-            # Извлекаем опыт работы
-            experience_years = 0
-            if full_resume.total_experience:
-                months = full_resume.total_experience.get("months", 0)
-                experience_years = round(months / 12, 1)
-
-            # Извлекаем навыки
-            skills = [skill["name"] for skill in full_resume.skills]
-
-            # Извлекаем ожидаемую зарплату
-            salary_expect = None
-            if full_resume.salary:
-                salary_expect = full_resume.salary.to or full_resume.salary.from_
-
-            # Извлекаем контакты (если доступны)
-            contacts = {}
-            if full_resume.contacts:
-                contacts = {
-                    "email": full_resume.contacts.get("email"),
-                    "phone": full_resume.contacts.get("phone")
-                }
-
-            return ResumeCreate(
-                source="hh",
-                source_id=hh_resume.id,
-                fio=hh_resume.title,
-                city=hh_resume.area.name,
-                experience_years=experience_years,
-                position=hh_resume.title.split(",")[0].strip(),
-                skills=skills,
-                salary_expect=salary_expect,
-                published_at=hh_resume.updated_at,
-                json_raw={
-                    "hh_data": full_resume.dict(),
-                    "contacts": contacts
-                }
-            )
+            return resume_from_hh(data)
         except Exception as e:
-            logger.error(f"Ошибка преобразования резюме {hh_resume.id}: {e}")
-            return None
\ No newline at end of file
+            logger.error(f"Ошибка преобразования резюме {data.get('id')}: {e}")
+            return None
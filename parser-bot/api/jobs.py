@@ -0,0 +1,387 @@
+# Фоновые задачи поиска: хранилище состояния, воркеры, отмена, подписка на прогресс
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .models import SearchJob, SearchRequest, CandidateSummary
+from .utils import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def search_key(request: SearchRequest) -> str:
+    """Ключ поиска для объединения одинаковых запросов: регистр и пробелы не важны"""
+    payload = [
+        " ".join(normalize_text(value).split())
+        for value in (request.position, request.city, request.description)
+    ] + [request.exp_min, request.exp_max, request.salary_max]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class InMemoryJobStore:
+    """Состояние задач в памяти процесса (тесты, один воркер uvicorn)"""
+
+    def __init__(self, ttl: float = 3600):
+        self.ttl = ttl
+        self.jobs: Dict[str, SearchJob] = {}
+        self.expires: Dict[str, float] = {}
+        self.cancel_requests: set = set()
+        self.claims: Dict[str, tuple] = {}  # ключ поиска → (id задачи, истекает)
+        self.versions: Dict[str, int] = {}  # id задачи → число сохранений
+        self.subscribers: Dict[str, int] = {}  # id задачи → число присоединённых клиентов
+        self.changed = asyncio.Condition()
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for job_id in [job_id for job_id, expires in self.expires.items() if expires < now]:
+            self.jobs.pop(job_id, None)
+            self.expires.pop(job_id, None)
+            self.versions.pop(job_id, None)
+            self.subscribers.pop(job_id, None)
+            self.cancel_requests.discard(job_id)
+        for key in [key for key, (_, expires) in self.claims.items() if expires < now]:
+            del self.claims[key]
+
+    async def save(self, job: SearchJob) -> None:
+        self._evict()
+        self.jobs[job.id] = job.copy(deep=True)
+        self.expires[job.id] = time.monotonic() + self.ttl
+        async with self.changed:
+            self.versions[job.id] = self.versions.get(job.id, 0) + 1
+            self.changed.notify_all()
+
+    async def get(self, job_id: str) -> Optional[SearchJob]:
+        job = self.jobs.get(job_id)
+        return job.copy(deep=True) if job else None
+
+    async def attach(self, job_id: str) -> int:
+        """Клиент присоединился к задаче; число присоединённых"""
+        self.subscribers[job_id] = self.subscribers.get(job_id, 0) + 1
+        return self.subscribers[job_id]
+
+    async def detach(self, job_id: str) -> int:
+        """Клиент отсоединился; сколько осталось"""
+        self.subscribers[job_id] = max(0, self.subscribers.get(job_id, 0) - 1)
+        return self.subscribers[job_id]
+
+    async def request_cancel(self, job_id: str) -> None:
+        self.cancel_requests.add(job_id)
+
+    async def cancel_requested(self, job_id: str) -> bool:
+        return job_id in self.cancel_requests
+
+    async def claim(self, key: str, job_id: str, ttl: float, replace: Optional[str] = None) -> Optional[str]:
+        """Закрепить ключ поиска за задачей. None — закреплён (свободен или был
+        за задачей replace), иначе id задачи, которая уже держит ключ"""
+        holder = self.claims.get(key)
+        if holder and holder[1] > time.monotonic() and holder[0] != replace:
+            return holder[0]
+        self.claims[key] = (job_id, time.monotonic() + ttl)
+        return None
+
+    async def release(self, key: str, job_id: str, ttl: Optional[float] = None) -> None:
+        """Ключ больше не держит задачу (ttl=None) или держит её ещё ttl секунд"""
+        holder = self.claims.get(key)
+        if holder and holder[0] == job_id:
+            if ttl:
+                self.claims[key] = (job_id, time.monotonic() + ttl)
+            else:
+                del self.claims[key]
+
+    @asynccontextmanager
+    async def watch(self, job_id: str) -> AsyncIterator["MemoryJobWatch"]:
+        yield MemoryJobWatch(self, job_id)
+
+
+class MemoryJobWatch:
+    """Подписка на изменения задачи в InMemoryJobStore: запоминает версию
+    при создании, поэтому сохранение до wait() не теряется"""
+
+    def __init__(self, store: InMemoryJobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+        self.seen = store.versions.get(job_id, 0)
+
+    async def wait(self, timeout: float) -> None:
+        """Ждёт сохранения задачи после предыдущего wait() (или создания подписки)"""
+        changed = self.store.changed
+        try:
+            async with changed:
+                await asyncio.wait_for(
+                    changed.wait_for(lambda: self.store.versions.get(self.job_id, 0) != self.seen),
+                    timeout
+                )
+        except asyncio.TimeoutError:
+            pass
+        self.seen = self.store.versions.get(self.job_id, 0)
+
+
+# KEYS[1] — ключ поиска; ARGV: id задачи, ttl в мс, id задачи, которую можно вытеснить
+_CLAIM_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if holder and holder ~= ARGV[3] then
+    return holder
+end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+return false
+"""
+
+# KEYS[1] — ключ поиска; ARGV: id задачи, новый ttl в мс (0 — удалить)
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    if tonumber(ARGV[2]) > 0 then
+        return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    end
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisJobStore:
+    """Состояние задач в Redis: общее для всех воркеров uvicorn,
+    изменения рассылаются через pub/sub"""
+
+    def __init__(self, redis, ttl: float = 3600, prefix: str = "job:"):
+        self.redis = redis
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    async def save(self, job: SearchJob) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self.prefix + job.id, job.json(), ex=self.ttl)
+            pipe.publish(self.prefix + job.id + ":events", job.status)
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> Optional[SearchJob]:
+        value = await self.redis.get(self.prefix + job_id)
+        return SearchJob.parse_raw(value) if value else None
+
+    async def _count_subscribers(self, job_id: str, delta: int) -> int:
+        key = self.prefix + job_id + ":subscribers"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incrby(key, delta)
+            pipe.expire(key, self.ttl)
+            count, _ = await pipe.execute()
+        return max(0, int(count))
+
+    async def attach(self, job_id: str) -> int:
+        return await self._count_subscribers(job_id, 1)
+
+    async def detach(self, job_id: str) -> int:
+        return await self._count_subscribers(job_id, -1)
+
+    async def request_cancel(self, job_id: str) -> None:
+        await self.redis.set(self.prefix + job_id + ":cancel", 1, ex=self.ttl)
+
+    async def cancel_requested(self, job_id: str) -> bool:
+        return bool(await self.redis.exists(self.prefix + job_id + ":cancel"))
+
+    async def claim(self, key: str, job_id: str, ttl: float, replace: Optional[str] = None) -> Optional[str]:
+        """Как InMemoryJobStore.claim, но атомарно для всех воркеров (SET NX / Lua)"""
+        result = await self.redis.eval(
+            _CLAIM_SCRIPT, 1, self.prefix + "key:" + key, job_id, int(ttl * 1000), replace or ""
+        )
+        return result.decode() if isinstance(result, bytes) else result
+
+    async def release(self, key: str, job_id: str, ttl: Optional[float] = None) -> None:
+        await self.redis.eval(_RELEASE_SCRIPT, 1, self.prefix + "key:" + key, job_id, int((ttl or 0) * 1000))
+
+    @asynccontextmanager
+    async def watch(self, job_id: str) -> AsyncIterator["RedisJobWatch"]:
+        """Подписка на канал задачи; сообщения после подписки копятся до wait()"""
+        pubsub = self.redis.pubsub()
+        try:
+            await pubsub.subscribe(self.prefix + job_id + ":events")
+            yield RedisJobWatch(pubsub)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.close()
+
+
+class RedisJobWatch:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def wait(self, timeout: float) -> None:
+        """Ждёт сообщения об изменении задачи (в том числе пришедшего до вызова)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            message = await self.pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=deadline - time.monotonic()
+            )
+            if message:
+                # Накопившиеся сообщения уже учтены чтением состояния после wait()
+                while await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=0):
+                    pass
+                return
+
+
+async def watch_job(store, job_id: str, heartbeat: float = 15.0) -> AsyncIterator[SearchJob]:
+    """Состояние задачи при каждом изменении (и не реже раза в heartbeat секунд)
+    до её завершения; задача исчезла из хранилища — итерация заканчивается.
+    Подписка оформляется до чтения состояния, иначе сохранение между
+    чтением и ожиданием потерялось бы до следующего heartbeat."""
+    async with store.watch(job_id) as changes:
+        while True:
+            job = await store.get(job_id)
+            if job is None:
+                return
+            yield job
+            if job.finished:
+                return
+            await changes.wait(heartbeat)
+
+
+class JobReporter:
+    """Передаётся конвейеру поиска: прогресс и промежуточный топ задачи.
+    Сохранение в хранилище не чаще раза в interval секунд."""
+
+    def __init__(self, manager: "JobManager", job: SearchJob, interval: float = 0.5):
+        self.manager = manager
+        self.job = job
+        self.interval = interval
+        self.saved_at = 0.0
+
+    async def update(
+        self,
+        stage: Optional[str] = None,
+        top: Optional[List[CandidateSummary]] = None,
+        force: bool = False,
+        **progress: int
+    ) -> None:
+        if stage and stage != self.job.stage:
+            self.job.stage = stage
+            force = True
+        if top is not None:
+            self.job.top = top
+        self.job.progress.update(progress)
+
+        now = time.monotonic()
+        if force or now - self.saved_at >= self.interval:
+            self.saved_at = now
+            await self.manager.save(self.job)
+            # Отмена из другого воркера видна только через хранилище
+            if await self.manager.store.cancel_requested(self.job.id):
+                raise asyncio.CancelledError()
+
+
+# Конвейер поиска: (запрос, репортёр) → итоговый топ кандидатов
+Pipeline = Callable[[SearchRequest, JobReporter], Awaitable[List[CandidateSummary]]]
+
+
+class JobManager:
+    """Запуск задач поиска в фоне: не больше max_workers одновременно,
+    остальные ждут в статусе queued.
+
+    Одинаковые поиски (search_key) объединяются: пока задача выполняется,
+    и ещё result_ttl секунд после успешного завершения новый запрос получает
+    ту же задачу. Ключ закрепляется в хранилище, поэтому это работает и между
+    воркерами uvicorn при RedisJobStore. Присоединившиеся клиенты считаются:
+    отмена отсоединяет только отменившего, сама задача отменяется, когда
+    отсоединился последний."""
+
+    def __init__(
+        self,
+        store,
+        pipeline: Pipeline,
+        max_workers: int = 4,
+        result_ttl: float = 60,
+        claim_ttl: float = 900
+    ):
+        self.store = store
+        self.pipeline = pipeline
+        self.workers = asyncio.Semaphore(max_workers)
+        self.result_ttl = result_ttl
+        self.claim_ttl = claim_ttl
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.stats = {"submitted": 0, "coalesced": 0}
+
+    async def save(self, job: SearchJob) -> None:
+        job.updated_at = datetime.utcnow()
+        await self.store.save(job)
+
+    async def submit(self, request: SearchRequest) -> SearchJob:
+        """Новая задача или уже идущая (недавно завершённая) с тем же ключом"""
+        job = SearchJob(id=uuid.uuid4().hex, request=request)
+        key = search_key(request)
+        holder = await self.store.claim(key, job.id, self.claim_ttl)
+        if holder:
+            existing = await self._get_holder(holder)
+            if existing and existing.status not in ("failed", "cancelled"):
+                self.stats["coalesced"] += 1
+                await self.store.attach(existing.id)
+                return existing
+            # Держатель ключа упал, отменён или истёк — занимаем ключ вместо него
+            holder = await self.store.claim(key, job.id, self.claim_ttl, replace=holder)
+            if holder:
+                self.stats["coalesced"] += 1
+                await self.store.attach(holder)
+                return await self.store.get(holder) or job
+
+        self.stats["submitted"] += 1
+        await self.store.attach(job.id)
+        await self.save(job)
+        task = asyncio.create_task(self._run(job, key))
+        self.tasks[job.id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(job.id, None))
+        return job
+
+    async def _get_holder(self, job_id: str, attempts: int = 5) -> Optional[SearchJob]:
+        """Задача, держащая ключ; её состояние сохраняется сразу после захвата
+        ключа, поэтому короткое отсутствие — не признак сбоя"""
+        for _ in range(attempts):
+            job = await self.store.get(job_id)
+            if job:
+                return job
+            await asyncio.sleep(0.05)
+        return None
+
+    async def _run(self, job: SearchJob, key: str) -> None:
+        try:
+            async with self.workers:
+                if await self.store.cancel_requested(job.id):
+                    raise asyncio.CancelledError()
+                job.status = "running"
+                await self.save(job)
+                job.top = await self.pipeline(job.request, JobReporter(self, job))
+                job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            logger.exception(f"Задача поиска {job.id} завершилась ошибкой")
+            job.status = "failed"
+            job.error = str(e)
+        await self.save(job)
+        # Успешный результат ещё result_ttl секунд отдаётся повторным запросам
+        await self.store.release(key, job.id, self.result_ttl if job.status == "done" else None)
+
+    async def cancel(self, job_id: str) -> Optional[SearchJob]:
+        """Отсоединение клиента от задачи. Задача отменяется, только если других
+        присоединённых клиентов не осталось; если она выполняется в другом
+        воркере — тот заметит запрос при следующем обновлении прогресса"""
+        job = await self.store.get(job_id)
+        if job is None or job.finished:
+            return job
+        if await self.store.detach(job_id) > 0:
+            return job
+        await self.store.request_cancel(job_id)
+        task = self.tasks.get(job_id)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return await self.store.get(job_id)
+
+    def metrics(self) -> Dict[str, int]:
+        return {**self.stats, "running": len(self.tasks)}
+
+    async def shutdown(self) -> None:
+        for task in list(self.tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
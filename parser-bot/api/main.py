@@ -1,13 +1,102 @@
 # FastAPI приложение
-from fastapi import FastAPI, HTTPException
+import os
+import aioredis
+from fastapi import Depends, FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from .models import Resume, ResumeAnalysis
-from .hh_client import fetch_resumes_from_hh
-from .openai_utils import analyze_resumes
-from typing import List
+from fastapi.responses import StreamingResponse
+from .models import ResumePage, DedupeResult, ResumeMatch, SearchRequest, SearchJob
+from sqlalchemy.ext.asyncio import AsyncSession
+from .crud import CRUDResume
+from .hh_client import HHClient
+from .avito_client import AvitoClient
+from .cache import ResponseCache, RedisCacheBackend, MemoryCacheBackend
+from .database import init_db, get_session, async_session
+from .export import iter_ndjson, iter_csv, gzip_stream
+from .dedupe import DedupeEngine
+from .openai_utils import LLMScorer
+from .analysis_cache import AnalysisCache
+from .embeddings import get_embedder
+from .jobs import JobManager, InMemoryJobStore, RedisJobStore, watch_job
+from .pipeline import SearchPipeline
+from .crawler import Crawler, parse_queries
+from typing import List, Optional
 
 app = FastAPI()
 
+# Redis для кэшей; без REDIS_URL работаем с кэшем в памяти
+REDIS_URL = os.getenv("REDIS_URL")
+redis = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+
+response_cache = ResponseCache(
+    RedisCacheBackend(redis) if redis else MemoryCacheBackend(),
+    ttls={
+        "search": float(os.getenv("HH_CACHE_SEARCH_TTL", "300")),
+        "resume": float(os.getenv("HH_CACHE_RESUME_TTL", "3600"))
+    }
+)
+
+# Один клиент HH на процесс: общий пул соединений и keep-alive
+hh_client = HHClient(
+    client_id=os.getenv("HH_CLIENT_ID", ""),
+    client_secret=os.getenv("HH_CLIENT_SECRET", ""),
+    base_url=os.getenv("HH_BASE_URL", "https://api.hh.ru"),
+    max_connections=int(os.getenv("HH_MAX_CONNECTIONS", "20")),
+    max_keepalive_connections=int(os.getenv("HH_MAX_KEEPALIVE", "20")),
+    timeout=float(os.getenv("HH_TIMEOUT", "30")),
+    areas_cache_path=os.getenv("HH_AREAS_CACHE", "/tmp/hh_areas.json"),
+    cache=response_cache
+)
+
+# Avito подключается, только если заданы ключи API
+avito_client = AvitoClient(
+    client_id=os.getenv("AVITO_CLIENT_ID", ""),
+    client_secret=os.getenv("AVITO_CLIENT_SECRET", ""),
+    base_url=os.getenv("AVITO_BASE_URL", "https://api.avito.ru"),
+    requests_per_second=float(os.getenv("AVITO_RPS", "5"))
+) if os.getenv("AVITO_CLIENT_ID") else None
+
+# Источники резюме; поиск опрашивает их параллельно
+sources = [source for source in (hh_client, avito_client) if source is not None]
+
+# Оценки GPT кэшируются по отпечаткам резюме и вакансии
+llm_scorer = LLMScorer(
+    concurrency=int(os.getenv("OPENAI_CONCURRENCY", "8")),
+    tokens_per_minute=int(os.getenv("OPENAI_TPM", "0")) or None,
+    batch_size=int(os.getenv("OPENAI_BATCH_SIZE", "1")),
+    cache=AnalysisCache(
+        RedisCacheBackend(redis) if redis else MemoryCacheBackend(
+            max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "50000"))
+        ),
+        ttl=float(os.getenv("ANALYSIS_CACHE_TTL", str(7 * 24 * 3600)))
+    )
+)
+
+# Эмбеддинги резюме для семантического поиска по своей базе
+embedder = get_embedder()
+
+# Сколько лучших по локальной оценке резюме отправлять в GPT (0 — все)
+PRERANK_TOP_K = int(os.getenv("PRERANK_TOP_K", "100"))
+
+# Поиски выполняются в фоне; состояние задач — в Redis, общее для воркеров uvicorn
+job_store = RedisJobStore(redis) if redis else InMemoryJobStore()
+job_manager = JobManager(
+    job_store,
+    SearchPipeline(sources, llm_scorer, embedder, prerank_top_k=PRERANK_TOP_K),
+    max_workers=int(os.getenv("SEARCH_WORKERS", "4")),
+    result_ttl=float(os.getenv("SEARCH_RESULT_TTL", "60"))
+)
+
+# Фоновый сборщик держит базу тёплой для пользовательских поисков.
+# CRAWL_QUERIES: «должность@город» через «;»; пусто — сборщик выключен
+crawler = Crawler(
+    hh_client,
+    parse_queries(os.getenv("CRAWL_QUERIES", "")),
+    embedder=embedder,
+    interval=float(os.getenv("CRAWL_INTERVAL", "3600")),
+    concurrency=int(os.getenv("CRAWL_WORKERS", "2")),
+    limit=int(os.getenv("CRAWL_LIMIT", "2000"))
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -15,16 +104,163 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/search/")
-async def search_resumes(position: str, city: str, description: str) -> List[ResumeAnalysis]:
-    # 1. Получаем резюме с HH
-    resumes = await fetch_resumes_from_hh(position, city)
-    
-    # 2. Анализируем через GPT
-    analyzed = await analyze_resumes(resumes, description)
-    
-    # 3. Возвращаем топ кандидатов
-    return sorted(analyzed, key=lambda x: x.score, reverse=True)[:10]
+@app.on_event("startup")
+async def startup():
+    await init_db()
+    for source in sources:
+        await source.startup()
+    crawler.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    crawler.shutdown()
+    await job_manager.shutdown()
+    for source in sources:
+        await source.shutdown()
+    if redis:
+        await redis.close()
+
+@app.post("/search/", response_model=SearchJob, status_code=202)
+async def search_resumes(request: SearchRequest):
+    """Ставит поиск в очередь; результат — GET /search/{job_id} или поток /events"""
+    return await job_manager.submit(request)
+
+async def _get_job(job_id: str) -> SearchJob:
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job
+
+@app.get("/search/{job_id}", response_model=SearchJob)
+async def get_search_job(job_id: str):
+    return await _get_job(job_id)
+
+@app.get("/search/{job_id}/events")
+async def search_job_events(job_id: str):
+    """Server-Sent Events: состояние задачи при каждом изменении до завершения"""
+    await _get_job(job_id)
+
+    async def events():
+        async for job in watch_job(job_store, job_id):
+            yield f"event: {job.status}\ndata: {job.json()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/search/{job_id}", response_model=SearchJob)
+async def cancel_search_job(job_id: str):
+    """Отсоединение от задачи; она отменяется, когда отсоединились все клиенты"""
+    await _get_job(job_id)
+    return await job_manager.cancel(job_id)
+
+@app.get("/resumes/", response_model=ResumePage)
+async def list_resumes(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    q: Optional[str] = None,
+    city: Optional[str] = None,
+    exp_min: Optional[int] = None,
+    exp_max: Optional[int] = None,
+    mode: str = Query("fts", regex="^(fts|substring)$"),
+    session: AsyncSession = Depends(get_session)
+):
+    crud = CRUDResume(session)
+    try:
+        # По умолчанию q ищется полнотекстово с ранжированием по релевантности
+        if q and mode == "fts":
+            return await crud.search(
+                q, cursor=cursor, limit=limit, city=city, exp_min=exp_min, exp_max=exp_max
+            )
+        return await crud.get_page(
+            cursor=cursor, limit=limit, q=q, city=city, exp_min=exp_min, exp_max=exp_max
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/resumes/similar", response_model=List[ResumeMatch])
+async def similar_resumes(
+    description: str,
+    limit: int = Query(20, ge=1, le=200),
+    city: Optional[str] = None,
+    exp_min: Optional[int] = None,
+    exp_max: Optional[int] = None,
+    session: AsyncSession = Depends(get_session)
+):
+    """Семантический поиск по сохранённым резюме, без запросов к HH"""
+    [vector] = await embedder.embed([description])
+    return await CRUDResume(session).nearest(
+        vector, limit=limit, city=city, exp_min=exp_min, exp_max=exp_max
+    )
+
+@app.post("/embeddings/backfill")
+async def backfill_embeddings(session: AsyncSession = Depends(get_session)):
+    return {"embedded": await CRUDResume(session).embed_missing(embedder)}
+
+async def _export_resumes(**filters):
+    """Резюме для выгрузки; своя сессия живёт столько же, сколько поток ответа"""
+    async with async_session() as session:
+        async for resume in CRUDResume(session).stream(**filters):
+            yield resume
+
+def _export_response(body, media_type: str, filename: str, gzip: bool) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+@app.get("/resumes/export.ndjson")
+async def export_ndjson(
+    q: Optional[str] = None,
+    city: Optional[str] = None,
+    exp_min: Optional[int] = None,
+    exp_max: Optional[int] = None,
+    raw: bool = True,
+    gzip: bool = False
+):
+    # json_raw выбирается из базы только когда он нужен в выгрузке
+    resumes = _export_resumes(q=q, city=city, exp_min=exp_min, exp_max=exp_max, include_raw=raw)
+    return _export_response(
+        iter_ndjson(resumes, include_raw=raw), "application/x-ndjson", "resumes.ndjson", gzip
+    )
+
+@app.get("/resumes/export.csv")
+async def export_csv(
+    q: Optional[str] = None,
+    city: Optional[str] = None,
+    exp_min: Optional[int] = None,
+    exp_max: Optional[int] = None,
+    gzip: bool = False
+):
+    resumes = _export_resumes(q=q, city=city, exp_min=exp_min, exp_max=exp_max)
+    return _export_response(iter_csv(resumes), "text/csv; charset=utf-8", "resumes.csv", gzip)
+
+@app.post("/duplicates/scan", response_model=DedupeResult)
+async def scan_duplicates(incremental: bool = True, session: AsyncSession = Depends(get_session)):
+    return await DedupeEngine(session).run(incremental=incremental)
+
+@app.get("/metrics/hh")
+async def hh_metrics():
+    return hh_client.metrics()
+
+@app.get("/metrics/sources")
+async def sources_metrics():
+    return {source.name: source.metrics() for source in sources}
+
+@app.get("/metrics/search")
+async def search_metrics():
+    return job_manager.metrics()
+
+@app.get("/metrics/crawler")
+async def crawler_metrics():
+    return {**crawler.metrics(), "shards": await crawler.status()}
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    return llm_scorer.metrics()
 
 @app.get("/ping")
 async def ping():
@@ -1,12 +1,17 @@
 # Pydantic/SQLModel модели
-from typing import List, Optional
+import os
+from typing import Dict, List, Optional
 from datetime import datetime
 from uuid import UUID
 import uuid
 from pydantic import BaseModel
 from sqlmodel import SQLModel, Field, Column, JSON
-from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
+from sqlalchemy import String, UniqueConstraint, Index, Computed, BigInteger, ForeignKey
+from pgvector.sqlalchemy import Vector
+
+# Размерность эмбеддингов резюме; менять вместе с колонкой (см. migrations/005)
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "256"))
 
 class ResumeBase(SQLModel):
     source: str = Field(..., max_length=10)  # hh|avito
@@ -18,13 +23,117 @@ class ResumeBase(SQLModel):
     skills: List[str] = Field(default_factory=list, sa_column=Column(ARRAY(String)))
     salary_expect: Optional[int] = Field(None)
     published_at: Optional[datetime] = Field(None)
-    json_raw: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    # Исходные данные источника — самое тяжёлое поле: в списки не выбирается (см. ResumeSummary),
+    # в базе — JSONB со сжатием TOAST (migrations/007)
+    json_raw: dict = Field(default_factory=dict, sa_column=Column(JSONB))
 
 class Resume(ResumeBase, table=True):
+    __table_args__ = (
+        UniqueConstraint("source", "source_id", name="uq_resume_source"),
+        # Триграммные индексы для ILIKE '%...%' (расширение pg_trgm)
+        Index("ix_resume_position_trgm", "position", postgresql_using="gin",
+              postgresql_ops={"position": "gin_trgm_ops"}),
+        Index("ix_resume_fio_trgm", "fio", postgresql_using="gin",
+              postgresql_ops={"fio": "gin_trgm_ops"}),
+        Index("ix_resume_city_trgm", "city", postgresql_using="gin",
+              postgresql_ops={"city": "gin_trgm_ops"}),
+        Index("ix_resume_skills", "skills", postgresql_using="gin"),
+        Index("ix_resume_experience_years", "experience_years"),
+    )
+
     id: UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+# Индекс под keyset-пагинацию: ORDER BY published_at DESC NULLS LAST, id DESC
+Index(
+    "ix_resume_published_at_id",
+    Resume.__table__.c.published_at.desc().nullslast(),
+    Resume.__table__.c.id.desc()
+)
+
+# Полнотекстовый документ резюме (русская морфология, веса A/B/C), см. RESUME_SEARCH_DOCUMENT_SQL.
+# Колонка не отображается в модель: в выборки и ответы API она не попадает.
+resume_search_vector = Column(
+    "search_vector",
+    TSVECTOR,
+    Computed("resume_search_document(position, skills, json_raw)", persisted=True)
+)
+Resume.__table__.append_column(resume_search_vector)
+Index("ix_resume_search_vector", resume_search_vector, postgresql_using="gin")
+
+# Эмбеддинг резюме для семантического поиска (api/embeddings.py), HNSW-индекс по косинусному расстоянию.
+# Как и search_vector, в модель не отображается.
+resume_embedding = Column("embedding", Vector(EMBEDDING_DIM), nullable=True)
+Resume.__table__.append_column(resume_embedding)
+Index(
+    "ix_resume_embedding_hnsw",
+    resume_embedding,
+    postgresql_using="hnsw",
+    postgresql_with={"m": 16, "ef_construction": 64},
+    postgresql_ops={"embedding": "vector_cosine_ops"}
+)
+
+# Функция должна существовать до создания таблицы (генерируемая колонка использует её)
+RESUME_SEARCH_DOCUMENT_SQL = """
+CREATE OR REPLACE FUNCTION resume_search_document(p_position text, p_skills text[], p_raw jsonb)
+RETURNS tsvector
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT setweight(to_tsvector('russian', coalesce(p_position, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(array_to_string(p_skills, ' '), '')), 'B')
+        || setweight(to_tsvector('russian', coalesce((
+            SELECT string_agg(concat_ws(' ', e->>'position', e->>'description'), ' ')
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(p_raw->'hh_data'->'experience') = 'array'
+                     THEN p_raw->'hh_data'->'experience'
+                     ELSE '[]'::jsonb END
+            ) AS e
+        ), '')), 'C')
+$$
+"""
+
+class RankingResult(SQLModel, table=True):
+    """Итог поиска для админ-панели: вакансия и топ кандидатов"""
+    __table_args__ = (
+        # История одной вакансии
+        Index("ix_rankingresult_vacancy_created_at", "vacancy_hash", "created_at"),
+    )
+
+    id: UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    job_id: str = Field(..., max_length=32)
+    vacancy_hash: str = Field(..., max_length=64)  # analysis_cache.vacancy_fingerprint
+    job_description: str
+    position: str = Field(..., max_length=100)
+    city: Optional[str] = Field(None, max_length=50)
+    candidates: int = 0  # сколько резюме рассматривалось
+    top_score: Optional[float] = None
+    top: List[dict] = Field(default_factory=list, sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+# Лента результатов в админ-панели: ORDER BY created_at DESC, id DESC (keyset-пагинация)
+Index(
+    "ix_rankingresult_created_at_id",
+    RankingResult.__table__.c.created_at.desc(),
+    RankingResult.__table__.c.id.desc()
+)
+
+class CrawlWatermark(SQLModel, table=True):
+    """Запрос фонового сборщика (api/crawler.py): водяной знак по времени
+    публикации и аренда, чтобы один запрос не обходили две реплики сразу"""
+    key: str = Field(..., primary_key=True, max_length=40)  # crawler.crawl_key
+    position: str = Field(..., max_length=100)
+    city: str = Field(..., max_length=50)
+    watermark: Optional[datetime] = None  # самое свежее обработанное резюме (UTC)
+    # Незавершённый проход (остановлен на limit): резюме новее backfill_to уже обработаны,
+    # следующие обходы берут более старые, а по завершении водяной знак — backfill_watermark
+    backfill_to: Optional[datetime] = None
+    backfill_watermark: Optional[datetime] = None
+    crawled_at: Optional[datetime] = None  # окончание последнего успешного обхода
+    lease_owner: Optional[str] = Field(None, max_length=64)
+    lease_until: Optional[datetime] = None
+    stored: int = 0  # сколько резюме сохранено за всё время
+    last_error: Optional[str] = None
+
 class ResumeCreate(ResumeBase):
     pass
 
@@ -37,12 +146,119 @@ class ResumeUpdate(BaseModel):
     salary_expect: Optional[int] = None
 
 class Duplicate(SQLModel, table=True):
+    __table_args__ = (
+        UniqueConstraint("orig", "dup", name="uq_duplicate_pair"),
+    )
+
     id: UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    orig: UUID = Field(foreign_key="resume.id")
-    dup: UUID = Field(foreign_key="resume.id")
+    # Пара удаляется вместе с любым из резюме
+    orig: UUID = Field(sa_column=Column(ForeignKey("resume.id", ondelete="CASCADE"), nullable=False))
+    dup: UUID = Field(sa_column=Column(ForeignKey("resume.id", ondelete="CASCADE"), nullable=False))
+    score: Optional[float] = Field(None)  # оценка сходства (Жаккар по MinHash)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class ResumeSignature(SQLModel, table=True):
+    """MinHash-сигнатура резюме и хэши LSH-полос для поиска дублей"""
+    __table_args__ = (
+        Index("ix_resumesignature_bands", "bands", postgresql_using="gin"),
+    )
+
+    # Сигнатура удаляется вместе с резюме
+    resume_id: UUID = Field(sa_column=Column(ForeignKey("resume.id", ondelete="CASCADE"), primary_key=True))
+    signature: List[int] = Field(default_factory=list, sa_column=Column(ARRAY(BigInteger)))
+    bands: List[int] = Field(default_factory=list, sa_column=Column(ARRAY(BigInteger)))
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
+
+class DedupeResult(BaseModel):
+    signed: int = 0
+    candidate_pairs: int = 0
+    duplicates: int = 0
+
+class ResumeSummary(BaseModel):
+    """Резюме в списках и выдаче поиска: все поля, кроме json_raw"""
+    id: UUID
+    source: str
+    source_id: str
+    fio: Optional[str] = None
+    city: Optional[str] = None
+    experience_years: Optional[int] = None
+    position: Optional[str] = None
+    skills: Optional[List[str]] = None
+    salary_expect: Optional[int] = None
+    published_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+class ResumePage(BaseModel):
+    items: List[ResumeSummary]
+    next_cursor: Optional[str] = None
+
+class BulkUpsertResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+class ResumeMatch(BaseModel):
+    resume: ResumeSummary
+    similarity: float  # косинусное сходство с текстом вакансии
+
 class ResumeAnalysis(BaseModel):
     resume: Resume
     score: float
-    details: str
\ No newline at end of file
+    details: str
+
+class SearchRequest(BaseModel):
+    position: str
+    city: str = "Москва"
+    description: str
+    exp_min: Optional[int] = None
+    exp_max: Optional[int] = None
+    salary_max: Optional[int] = None
+
+class CandidateSummary(BaseModel):
+    """Кандидат в результатах поиска: поля резюме без json_raw и оценка GPT"""
+    source: str
+    source_id: str
+    fio: Optional[str] = None
+    position: Optional[str] = None
+    city: Optional[str] = None
+    experience_years: Optional[int] = None
+    skills: List[str] = []
+    salary_expect: Optional[int] = None
+    score: float
+    details: str
+
+    @classmethod
+    def from_analysis(cls, analysis: "ResumeAnalysis") -> "CandidateSummary":
+        resume = analysis.resume
+        return cls(
+            source=resume.source,
+            source_id=resume.source_id,
+            fio=resume.fio,
+            position=resume.position,
+            city=resume.city,
+            experience_years=resume.experience_years,
+            skills=resume.skills or [],
+            salary_expect=resume.salary_expect,
+            score=analysis.score,
+            details=analysis.details
+        )
+
+# Статусы задачи поиска; done, failed и cancelled — конечные
+JOB_FINISHED = ("done", "failed", "cancelled")
+
+class SearchJob(BaseModel):
+    """Состояние фоновой задачи поиска (api/jobs.py)"""
+    id: str
+    request: SearchRequest
+    status: str = "queued"  # queued|running|done|failed|cancelled
+    stage: Optional[str] = None  # harvest|prerank|scoring
+    progress: Dict[str, int] = {}
+    top: List[CandidateSummary] = []
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JOB_FINISHED
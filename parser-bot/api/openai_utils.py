@@ -1,45 +1,213 @@
 # Интеграция с ChatGPT
+import asyncio
 import json
+import logging
+import os
+import re
 import openai
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence
 from .models import Resume, ResumeAnalysis
+from .analysis_cache import AnalysisCache
+from .utils import TokenBucket, backoff_delay
 
-async def analyze_resumes(resumes: List[Resume], job_description: str) -> List[ResumeAnalysis]:
-    system_prompt = """
+logger = logging.getLogger(__name__)
+
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE")  # например, локальный фейковый сервер
+
+SYSTEM_PROMPT = """
     Ты HR-ассистент. Сравниваешь резюме с описанием вакансии.
     Оценивай по 3 критериям (0-10):
     1. Соответствие навыков
     2. Опыт работы
     3. Общее впечатление
-    
+
     Верни JSON с полями: score (среднее), details (краткий анализ).
     """
-    
-    results = []
-    for resume in resumes:
-        prompt = f"""
-        Вакансия: {job_description}
-        
-        Резюме:
-        Позиция: {resume.position}
-        Опыт: {resume.experience_years} лет
-        Навыки: {', '.join(resume.skills)}
-        """
-        
-        response = await openai.ChatCompletion.acreate(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
+
+BATCH_SYSTEM_PROMPT = """
+    Ты HR-ассистент. Сравниваешь несколько резюме с описанием вакансии.
+    Каждое резюме оценивай по 3 критериям (0-10):
+    1. Соответствие навыков
+    2. Опыт работы
+    3. Общее впечатление
+
+    Верни JSON-массив объектов с полями: index (номер резюме в квадратных скобках),
+    score (среднее), details (краткий анализ). По одному объекту на каждое резюме.
+    """
+
+_JSON_BLOCK = re.compile(r"[\[{].*[\]}]", re.S)
+
+
+def resume_prompt(resume: Resume) -> str:
+    return (
+        f"Позиция: {resume.position}\n"
+        f"Опыт: {resume.experience_years} лет\n"
+        f"Навыки: {', '.join(resume.skills or [])}"
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка числа токенов (кириллица — около 3 символов на токен)"""
+    return len(text) // 3 + 1
+
+
+def parse_json_reply(content: Optional[str]) -> Any:
+    """JSON из ответа модели; терпим обёртку ```json ... ``` и текст вокруг.
+    Пустой ответ (content = None) — ValueError, как и любой неразобранный"""
+    if not content:
+        raise ValueError("Пустой ответ модели")
+    try:
+        return json.loads(content)
+    except ValueError:
+        match = _JSON_BLOCK.search(content)
+        if not match:
+            raise
+        return json.loads(match.group(0))
+
+
+def to_analysis(resume: Resume, analysis: Dict[str, Any]) -> ResumeAnalysis:
+    return ResumeAnalysis(
+        resume=resume,
+        score=float(analysis["score"]),
+        details=str(analysis["details"])
+    )
+
+
+class LLMScorer:
+    """Оценка резюме через ChatGPT: параллельно (не более concurrency запросов),
+    в рамках бюджета токенов в минуту, при batch_size > 1 — по несколько
+    резюме в одном запросе. Ошибка разбора ответа повторяется для одного
+    резюме и не роняет всю пачку. Если задан cache, уже оценённые против
+    той же вакансии резюме в модель не отправляются."""
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        tokens_per_minute: Optional[int] = None,
+        batch_size: int = 1,
+        max_retries: int = 2,
+        max_tokens: int = 300,
+        model: str = OPENAI_MODEL,
+        api_base: Optional[str] = OPENAI_API_BASE,
+        cache: Optional[AnalysisCache] = None
+    ):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.token_budget = (
+            TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
         )
-        
-        analysis = json.loads(response.choices[0].message.content)
-        results.append(ResumeAnalysis(
-            resume=resume,
-            score=analysis['score'],
-            details=analysis['details']
-        ))
-    
-    return results
\ No newline at end of file
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.max_tokens = max_tokens
+        self.model = model
+        self.api_base = api_base
+        self.cache = cache
+        self.stats = {"requests": 0, "retries": 0, "failed": 0, "batch_fallbacks": 0}
+
+    async def _complete(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        """Один запрос к модели с учётом бюджета токенов и лимита параллельности"""
+        if self.token_budget:
+            estimated = sum(estimate_tokens(message["content"]) for message in messages) + max_tokens
+            await self.token_budget.acquire(min(estimated, self.token_budget.capacity))
+
+        kwargs = {"api_base": self.api_base} if self.api_base else {}
+        async with self.semaphore:
+            self.stats["requests"] += 1
+            response = await openai.ChatCompletion.acreate(
+                model=self.model,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+        return response.choices[0].message.content
+
+    async def score_one(self, resume: Resume, job_description: str) -> Optional[ResumeAnalysis]:
+        """Оценка одного резюме с повторами; None, если ответ так и не разобрался"""
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Вакансия: {job_description}\n\nРезюме:\n{resume_prompt(resume)}"}
+        ]
+        for attempt in range(self.max_retries + 1):
+            try:
+                return to_analysis(resume, parse_json_reply(await self._complete(messages, self.max_tokens)))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Некорректный ответ модели для резюме {resume.source_id}: {e}")
+            except openai.error.OpenAIError as e:
+                logger.warning(f"Ошибка OpenAI для резюме {resume.source_id}: {e}")
+                await asyncio.sleep(backoff_delay(attempt))
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+
+        self.stats["failed"] += 1
+        return None
+
+    async def score_batch(self, resumes: Sequence[Resume], job_description: str) -> List[Optional[ResumeAnalysis]]:
+        """Оценка нескольких резюме одним запросом; не разобранные
+        из ответа оцениваются по одному"""
+        blocks = "\n\n".join(f"[{index}]\n{resume_prompt(resume)}" for index, resume in enumerate(resumes))
+        messages = [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Вакансия: {job_description}\n\nРезюме:\n{blocks}"}
+        ]
+
+        results: List[Optional[ResumeAnalysis]] = [None] * len(resumes)
+        try:
+            reply = parse_json_reply(await self._complete(messages, self.max_tokens * len(resumes)))
+            for item in reply if isinstance(reply, list) else []:
+                try:
+                    index = int(item["index"])
+                    if 0 <= index < len(resumes):
+                        results[index] = to_analysis(resumes[index], item)
+                except (ValueError, KeyError, TypeError):
+                    continue
+        except (ValueError, openai.error.OpenAIError) as e:
+            logger.warning(f"Пакетная оценка не удалась, оцениваем по одному: {e}")
+
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            self.stats["batch_fallbacks"] += len(missing)
+            retried = await asyncio.gather(*(self.score_one(resumes[index], job_description) for index in missing))
+            for index, result in zip(missing, retried):
+                results[index] = result
+        return results
+
+    async def _score(self, resumes: Sequence[Resume], job_description: str) -> List[Optional[ResumeAnalysis]]:
+        if self.batch_size > 1:
+            batches = [resumes[start:start + self.batch_size] for start in range(0, len(resumes), self.batch_size)]
+            scored = await asyncio.gather(*(self.score_batch(batch, job_description) for batch in batches))
+            return [result for batch in scored for result in batch]
+        return list(await asyncio.gather(*(self.score_one(resume, job_description) for resume in resumes)))
+
+    async def analyze(self, resumes: Sequence[Resume], job_description: str) -> List[ResumeAnalysis]:
+        """Оценка всех резюме; порядок результатов совпадает с порядком входа"""
+        if self.cache is None:
+            results = await self._score(resumes, job_description)
+            return [result for result in results if result is not None]
+
+        results = await self.cache.get_many(resumes, job_description)
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            scored = await self._score([resumes[index] for index in missing], job_description)
+            for index, result in zip(missing, scored):
+                results[index] = result
+            await self.cache.set_many([result for result in scored if result is not None], job_description)
+        return [result for result in results if result is not None]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "token_budget": self.token_budget.metrics() if self.token_budget else None,
+            "cache": self.cache.metrics() if self.cache else None
+        }
+
+
+default_scorer = LLMScorer()
+
+
+async def analyze_resumes(
+    resumes: List[Resume],
+    job_description: str,
+    scorer: Optional[LLMScorer] = None
+) -> List[ResumeAnalysis]:
+    return await (scorer or default_scorer).analyze(resumes, job_description)
@@ -0,0 +1,122 @@
+# Конвейер поиска кандидатов: сбор с HH и Avito → сохранение → предранжирование → оценка GPT
+import asyncio
+import heapq
+import logging
+from typing import Dict, List, Optional
+
+from .analysis_cache import vacancy_fingerprint
+from .crud import CRUDResume, CRUDRankingResult
+from .database import async_session
+from .embeddings import Embedder
+from .jobs import JobReporter
+from .models import CandidateSummary, SearchRequest, RankingResult
+from .openai_utils import LLMScorer
+from .prerank import prerank
+from .sources import HarvestStats, ResumeSource, merge_sources
+
+logger = logging.getLogger(__name__)
+
+
+class SearchPipeline:
+    """Один проход поиска для задачи из api/jobs.py. Прогресс и промежуточный
+    топ отправляются в reporter: оценки GPT идут частями по chunk_size резюме,
+    и топ обновляется по мере их готовности."""
+
+    def __init__(
+        self,
+        sources: List[ResumeSource],
+        scorer: LLMScorer,
+        embedder: Optional[Embedder] = None,
+        prerank_top_k: int = 100,
+        top_n: int = 10,
+        chunk_size: int = 10
+    ):
+        self.sources = sources
+        self.scorer = scorer
+        self.embedder = embedder
+        self.prerank_top_k = prerank_top_k
+        self.top_n = top_n
+        self.chunk_size = chunk_size
+
+    async def __call__(self, request: SearchRequest, reporter: JobReporter) -> List[CandidateSummary]:
+        async with async_session() as session:
+            crud = CRUDResume(session)
+
+            # 1. Получаем со всех источников сразу только новые и изменившиеся резюме и сохраняем их
+            stats: Dict[str, HarvestStats] = {}
+            session_lock = asyncio.Lock()
+
+            async def known_versions(source: str, ids: List[str]):
+                # Источники спрашивают базу одновременно, а сессия одна
+                async with session_lock:
+                    return await crud.get_versions_by_source(source, ids)
+
+            await reporter.update(stage="harvest")
+            resumes = []
+            async for resume in merge_sources(
+                self.sources,
+                request.position,
+                request.city,
+                known_versions=known_versions,
+                stats=stats
+            ):
+                resumes.append(resume)
+                await reporter.update(
+                    found=sum(source.found for source in stats.values()),
+                    fetched=len(resumes),
+                    skipped=sum(len(source.skipped_ids) for source in stats.values())
+                )
+            await crud.bulk_upsert(resumes, embedder=self.embedder)
+
+            # Неизменившиеся резюме берём из базы
+            unchanged = []
+            for name, source_stats in stats.items():
+                unchanged += await crud.get_many_by_source(name, source_stats.skipped_ids)
+
+        # 2. Отбираем кандидатов локально
+        candidates = [*resumes, *unchanged]
+        await reporter.update(stage="prerank", candidates=len(candidates))
+        if self.prerank_top_k:
+            candidates = prerank(
+                candidates, request.description, self.prerank_top_k,
+                request.exp_min, request.exp_max, request.salary_max
+            )
+
+        # 3. Оцениваем через GPT частями; лимит параллельности — внутри scorer
+        await reporter.update(stage="scoring", to_score=len(candidates), scored=0, force=True)
+        chunks = [
+            asyncio.create_task(self.scorer.analyze(candidates[start:start + self.chunk_size], request.description))
+            for start in range(0, len(candidates), self.chunk_size)
+        ]
+        top: List[CandidateSummary] = []
+        scored = 0
+        try:
+            for chunk in asyncio.as_completed(chunks):
+                analyzed = await chunk
+                scored += len(analyzed)
+                top = heapq.nlargest(
+                    self.top_n,
+                    [*top, *map(CandidateSummary.from_analysis, analyzed)],
+                    key=lambda candidate: candidate.score
+                )
+                await reporter.update(top=top, scored=scored)
+        finally:
+            for chunk in chunks:
+                chunk.cancel()
+
+        # 4. Сохраняем итог для админ-панели; сбой записи не должен стоить пользователю результатов
+        try:
+            async with async_session() as session:
+                await CRUDRankingResult(session).create(RankingResult(
+                    job_id=reporter.job.id,
+                    vacancy_hash=vacancy_fingerprint(request.description),
+                    job_description=request.description,
+                    position=request.position[:100],
+                    city=request.city[:50] if request.city else None,
+                    candidates=reporter.job.progress.get("candidates", 0),
+                    top_score=top[0].score if top else None,
+                    top=[candidate.dict() for candidate in top]
+                ))
+        except Exception:
+            logger.exception(f"Не удалось сохранить итог поиска {reporter.job.id} для админ-панели")
+        return top
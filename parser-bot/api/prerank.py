@@ -0,0 +1,139 @@
+# Быстрое локальное предранжирование резюме перед оценкой GPT
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .models import Resume
+from .utils import normalize_text
+
+_TOKEN = re.compile(r"[0-9a-zа-я+#]+(?:\.[0-9a-zа-я]+)*")
+_CYRILLIC = re.compile(r"[а-я]")
+
+# Вклад признаков в итоговую оценку (сумма — 1)
+WEIGHTS = {"skills": 0.4, "bm25": 0.3, "experience": 0.2, "salary": 0.1}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Токены текста; русские слова грубо обрезаются до 6 букв вместо стемминга"""
+    tokens = _TOKEN.findall(normalize_text(text))
+    return [token[:6] if len(token) > 6 and _CYRILLIC.search(token) else token for token in tokens]
+
+
+@lru_cache(maxsize=4096)
+def skill_tokens(skill: str) -> tuple:
+    """Токены навыка; навыки повторяются между резюме, поэтому кэшируем"""
+    return tuple(tokenize(skill))
+
+
+def resume_text(resume: Resume) -> str:
+    """Текст резюме для BM25: позиция, навыки и описания опыта из ответа HH
+    (для Avito — текст резюме)"""
+    parts = [resume.position or "", " ".join(resume.skills or [])]
+    raw = resume.json_raw or {}
+    hh_data = raw.get("hh_data") or {}
+    for experience in hh_data.get("experience") or []:
+        parts.append(experience.get("position") or "")
+        parts.append(experience.get("description") or "")
+    parts.append((raw.get("avito_data") or {}).get("description") or "")
+    return " ".join(parts)
+
+
+def skill_overlap(resumes: Sequence[Resume], vacancy_tokens: set) -> np.ndarray:
+    """Число навыков резюме, упомянутых в тексте вакансии, относительно лучшего в пачке"""
+    matched = np.array([
+        sum(bool(tokens) and vacancy_tokens.issuperset(tokens) for tokens in map(skill_tokens, resume.skills or []))
+        for resume in resumes
+    ], dtype=float)
+    top = matched.max()
+    return matched / top if top > 0 else matched
+
+
+def bm25(documents: Sequence[List[str]], query: Sequence[str]) -> np.ndarray:
+    """BM25 запроса по каждому документу пачки, нормированный в [0, 1]"""
+    terms = sorted(set(query))
+    if not documents or not terms:
+        return np.zeros(len(documents))
+
+    column = {term: index for index, term in enumerate(terms)}
+    tf = np.zeros((len(documents), len(terms)))
+    lengths = np.empty(len(documents))
+    for row, tokens in enumerate(documents):
+        lengths[row] = len(tokens)
+        for token in tokens:
+            index = column.get(token)
+            if index is not None:
+                tf[row, index] += 1
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1.0))
+    scores = (tf * (BM25_K1 + 1) / (tf + norm[:, None])) @ idf
+    top = scores.max()
+    return scores / top if top > 0 else scores
+
+
+def range_fit(values: np.ndarray, low: Optional[float], high: Optional[float], scale: float) -> np.ndarray:
+    """1 внутри [low, high], линейно убывает до 0 на расстоянии scale от границы"""
+    distance = np.zeros_like(values)
+    if low is not None:
+        distance = np.maximum(distance, low - values)
+    if high is not None:
+        distance = np.maximum(distance, values - high)
+    return np.clip(1 - distance / scale, 0.0, 1.0)
+
+
+def score_resumes(
+    resumes: Sequence[Resume],
+    description: str,
+    exp_min: Optional[int] = None,
+    exp_max: Optional[int] = None,
+    salary_max: Optional[int] = None,
+    weights: Dict[str, float] = WEIGHTS
+) -> np.ndarray:
+    """Оценка от 0 до 1 для каждого резюме пачки"""
+    if not resumes:
+        return np.zeros(0)
+
+    vacancy_tokens = tokenize(description)
+    features = {
+        "skills": skill_overlap(resumes, set(vacancy_tokens)),
+        "bm25": bm25([tokenize(resume_text(resume)) for resume in resumes], vacancy_tokens),
+    }
+
+    experience = np.array([resume.experience_years or 0 for resume in resumes], dtype=float)
+    if exp_min is None and exp_max is None:
+        # Без требований к опыту больше опыта — лучше, с насыщением на 10 годах
+        features["experience"] = np.minimum(experience, 10) / 10
+    else:
+        features["experience"] = range_fit(experience, exp_min, exp_max, scale=3)
+
+    if salary_max:
+        salary = np.array([resume.salary_expect or np.nan for resume in resumes], dtype=float)
+        # Зарплата не указана — нейтральные 0.5
+        features["salary"] = np.where(np.isnan(salary), 0.5, range_fit(salary, None, salary_max, scale=salary_max / 2))
+    else:
+        features["salary"] = np.full(len(resumes), 0.5)
+
+    return sum(weight * features[name] for name, weight in weights.items())
+
+
+def prerank(
+    resumes: Sequence[Resume],
+    description: str,
+    top_k: int,
+    exp_min: Optional[int] = None,
+    exp_max: Optional[int] = None,
+    salary_max: Optional[int] = None
+) -> List[Resume]:
+    """top_k лучших резюме по локальной оценке, от лучшего к худшему"""
+    if len(resumes) <= top_k:
+        return list(resumes)
+    scores = score_resumes(resumes, description, exp_min, exp_max, salary_max)
+    # Стабильная сортировка: при равных оценках сохраняется исходный порядок
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    return [resumes[index] for index in order]
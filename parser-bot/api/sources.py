@@ -0,0 +1,123 @@
+# Источники резюме (HH, Avito) и параллельный сбор со всех сразу
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .models import ResumeCreate
+
+logger = logging.getLogger(__name__)
+
+
+class HarvestStats(BaseModel):
+    """Статистика одного прохода сборщика"""
+    found: int = 0
+    details_fetched: int = 0
+    skipped_ids: List[str] = []
+    newest: Optional[datetime] = None  # самая свежая дата обновления в выдаче (UTC)
+    partitions: int = 0  # сколько частей появилось при делении запроса
+    truncated: int = 0  # части, которые не делятся, но найдено в них больше max_depth
+    failed_pages: int = 0  # страницы выдачи, которые не удалось получить
+    failed_details: int = 0  # резюме, детали которых не удалось получить
+    limited: bool = False  # обход остановлен на limit, дальше в выдаче могли быть резюме
+    covered_to: Optional[datetime] = None  # проход не полный, но все резюме новее этой даты обработаны (HH)
+    error: Optional[str] = None  # источник упал целиком (merge_sources)
+
+    @property
+    def complete(self) -> bool:
+        """Выдача пройдена целиком и без ошибок: только тогда newest годится
+        в водяной знак — иначе пропущенные резюме окажутся за ним"""
+        return not (self.failed_pages or self.failed_details or self.truncated or self.limited or self.error)
+
+# Функция, возвращающая сохранённые даты публикации по списку ID источника
+KnownVersions = Callable[[List[str]], Awaitable[Dict[str, Optional[datetime]]]]
+
+
+class ResumeSource(ABC):
+    """Коннектор к площадке с резюме: свой HTTP-клиент, свой лимит запросов
+    и преобразование в ResumeCreate (source = name)"""
+
+    name: str
+
+    async def startup(self) -> None:
+        """Создание HTTP-клиента (при старте приложения)"""
+
+    async def shutdown(self) -> None:
+        """Закрытие HTTP-клиента"""
+
+    def metrics(self) -> Dict[str, Any]:
+        return {}
+
+    @abstractmethod
+    def iter_resumes(
+        self,
+        position: str,
+        city: str,
+        *,
+        limit: int = 1000,
+        known_versions: Optional[KnownVersions] = None,
+        stats: Optional[HarvestStats] = None,
+        newer_than: Optional[datetime] = None
+    ) -> AsyncIterator[ResumeCreate]:
+        """Резюме по запросу по мере готовности. С known_versions детали
+        запрашиваются только для новых и изменившихся резюме, ID остальных
+        попадают в stats.skipped_ids."""
+
+
+async def merge_sources(
+    sources: List[ResumeSource],
+    position: str,
+    city: str,
+    *,
+    limit: int = 1000,
+    known_versions: Optional[Callable[[str, List[str]], Awaitable[Dict[str, Optional[datetime]]]]] = None,
+    stats: Optional[Dict[str, HarvestStats]] = None,
+    newer_than: Optional[datetime] = None
+) -> AsyncIterator[ResumeCreate]:
+    """Сбор со всех источников одновременно: резюме отдаются в порядке
+    готовности, общее время — как у самого медленного источника, а не сумма.
+    Ошибка одного источника не останавливает остальные (см. stats[name].error).
+    known_versions(source, ids) — как KnownVersions, но с именем источника."""
+    stats = stats if stats is not None else {}
+    done = object()
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def pump(source: ResumeSource) -> None:
+        source_stats = stats.setdefault(source.name, HarvestStats())
+        versions = None
+        if known_versions is not None:
+            versions = lambda ids: known_versions(source.name, ids)
+        try:
+            async for resume in source.iter_resumes(
+                position,
+                city,
+                limit=limit,
+                known_versions=versions,
+                stats=source_stats,
+                newer_than=newer_than
+            ):
+                results.put_nowait(resume)
+        except Exception as e:
+            source_stats.error = str(e) or type(e).__name__
+            logger.exception(f"Ошибка сбора резюме из {source.name}")
+        finally:
+            results.put_nowait(done)
+
+    tasks = [asyncio.create_task(pump(source)) for source in sources]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            resume = await results.get()
+            if resume is done:
+                remaining -= 1
+                continue
+            yield resume
+    finally:
+        # Дожидаемся остановки: иначе вызывающий закроет сессию known_versions,
+        # пока источник ещё читает через неё
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,23 +1,136 @@
 import asyncio
+import random
 import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from functools import wraps
-from typing import Callable, Any
+from typing import Callable, Any, Optional
 
-def rate_limit(requests_per_second: int):
+
+class TokenBucket:
+    """Асинхронный token bucket: rate токенов в секунду, до capacity подряд (burst)"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+        # Метрики
+        self.acquired = 0
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def pause(self, seconds: float) -> None:
+        """Приостановить выдачу токенов (например, после 429 с Retry-After)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        # Ведро начинает наполняться только после паузы, без всплеска
+        self.tokens = 0
+        self.updated_at = self.paused_until
+
+    async def acquire(self, tokens: float = 1) -> float:
+        """Дождаться и забрать tokens токенов; возвращает время ожидания в секундах"""
+        if tokens > self.capacity:
+            raise ValueError(f"Запрошено {tokens} токенов при ёмкости {self.capacity}")
+
+        waited = 0.0
+        # Блокировка сохраняет порядок ожидающих (FIFO)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        break
+                    delay = (tokens - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+        self.acquired += 1
+        if waited:
+            self.throttled += 1
+            self.throttled_seconds += waited
+        return waited
+
+    def metrics(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+        }
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Текст для сравнения: регистр, ё → е, крайние пробелы"""
+    return (value or "").casefold().replace("ё", "е").strip()
+
+
+def to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Дата в UTC без tzinfo — в таком виде даты хранятся в базе"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_hh_datetime(value: str) -> datetime:
+    """Дата из ответа HH («2024-05-01T12:00:00+0300») в UTC без tzinfo.
+    fromisoformat в Python 3.10 не понимает смещение без двоеточия и «Z»"""
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    elif len(value) > 5 and value[-5] in "+-" and value[-4:].isdigit():
+        value = f"{value[:-2]}:{value[-2:]}"
+    return to_utc_naive(datetime.fromisoformat(value))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Значение заголовка Retry-After в секундах (число или HTTP-дата)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 0.5,
+    cap: float = 30.0,
+    retry_after: Optional[str] = None
+) -> float:
+    """Задержка перед повтором: Retry-After, если он есть, иначе экспонента с full jitter"""
+    delay = parse_retry_after(retry_after)
+    if delay is not None:
+        return min(delay, cap)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def rate_limit(requests_per_second: float, burst: Optional[float] = None):
     """Декоратор для ограничения количества запросов в секунду"""
     def decorator(func: Callable) -> Callable:
-        last_called = 0
-        
+        bucket = TokenBucket(requests_per_second, burst)
+
         @wraps(func)
         async def wrapper(*args, **kwargs) -> Any:
-            nonlocal last_called
-            elapsed = time.time() - last_called
-            wait_time = max(0, 1/requests_per_second - elapsed)
-            
-            if wait_time > 0:
-                await asyncio.sleep(wait_time)
-            
-            last_called = time.time()
+            await bucket.acquire()
             return await func(*args, **kwargs)
+
+        wrapper.bucket = bucket
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,100 @@
+# Бенчмарк MinHash/LSH-дедупликации на синтетическом корпусе (без базы)
+#
+#     python -m benchmarks.bench_dedupe --resumes 100000 --dup-rate 0.1
+import argparse
+import json
+import random
+import time
+from types import SimpleNamespace
+
+from api.dedupe import MinHasher, resume_features, candidate_pairs, estimate_similarity
+
+FIRST = ["Иван", "Пётр", "Анна", "Мария", "Сергей", "Ольга", "Дмитрий", "Елена", "Алексей", "Наталья"]
+LAST = ["Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Васильев", "Соколов", "Морозов", "Волков"]
+SKILLS = ["Python", "Django", "SQL", "PostgreSQL", "Docker", "Kubernetes", "Go", "Java", "React", "Linux",
+          "Redis", "Kafka", "Git", "FastAPI", "Pandas", "Spark", "Airflow", "C++", "TypeScript", "CI/CD"]
+POSITIONS = ["Python разработчик", "Backend developer", "Data engineer", "DevOps инженер", "Аналитик данных"]
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Екатеринбург"]
+
+
+def make_resume(rng: random.Random, index: int) -> SimpleNamespace:
+    phone = f"+7 (9{rng.randint(10, 99)}) {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}"
+    return SimpleNamespace(
+        id=index,
+        source="hh",
+        fio=f"{rng.choice(LAST)} {rng.choice(FIRST)} {index}",
+        position=rng.choice(POSITIONS),
+        city=rng.choice(CITIES),
+        skills=rng.sample(SKILLS, rng.randint(3, 8)),
+        json_raw={"contacts": {"phone": phone, "email": f"user{index}@example.com"}},
+    )
+
+
+def mutate(rng: random.Random, original: SimpleNamespace, index: int) -> SimpleNamespace:
+    """Тот же человек из другого источника: другой порядок ФИО, формат телефона, часть навыков"""
+    skills = [skill.lower() for skill in original.skills]
+    if len(skills) > 3:
+        skills.remove(rng.choice(skills))
+    phone = "8" + "".join(ch for ch in original.json_raw["contacts"]["phone"] if ch.isdigit())[1:]
+    return SimpleNamespace(
+        id=index,
+        source="avito",
+        fio=" ".join(reversed(original.fio.split())).upper(),
+        position=original.position,
+        city=original.city,
+        skills=skills,
+        json_raw={"contacts": {"phone": phone, "email": original.json_raw["contacts"]["email"].upper()}},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк MinHash/LSH-дедупликации")
+    parser.add_argument("--resumes", type=int, default=100000)
+    parser.add_argument("--dup-rate", type=float, default=0.1)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    originals = int(args.resumes * (1 - args.dup_rate))
+    corpus = [make_resume(rng, i) for i in range(originals)]
+    truth = set()
+    for i in range(originals, args.resumes):
+        original = rng.choice(corpus[:originals])
+        corpus.append(mutate(rng, original, i))
+        truth.add((original.id, i))
+
+    hasher = MinHasher()
+    timings = {}
+
+    started = time.perf_counter()
+    features = [resume_features(resume) for resume in corpus]
+    timings["features_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    signatures = hasher.signatures(features)
+    bands = hasher.band_hashes(signatures)
+    timings["signatures_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pairs = candidate_pairs({i: bands[i].tolist() for i in range(len(corpus))})
+    timings["lsh_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    found = {pair for pair in pairs if estimate_similarity(signatures[pair[0]], signatures[pair[1]]) >= args.threshold}
+    timings["verify_s"] = time.perf_counter() - started
+
+    print(json.dumps({
+        "resumes": args.resumes,
+        "true_pairs": len(truth),
+        "candidate_pairs": len(pairs),
+        "found_pairs": len(found),
+        "recall": round(len(found & truth) / len(truth), 4) if truth else None,
+        "precision": round(len(found & truth) / len(found), 4) if found else None,
+        **{name: round(value, 3) for name, value in timings.items()},
+        "total_s": round(sum(timings.values()), 3),
+    }))
+
+
+if __name__ == "__main__":
+    main()
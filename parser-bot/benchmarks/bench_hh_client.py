@@ -0,0 +1,74 @@
+# Бенчмарк HHClient: клиент на каждый запрос против общего пула соединений
+#
+# Запуск из каталога parser-bot:
+#     python -m benchmarks.bench_hh_client --requests 2000 --concurrency 20
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from api.hh_client import HHClient
+from .fake_hh import FakeHHApp, ServerThread
+
+
+async def run_per_call(url: str, requests: int, concurrency: int) -> float:
+    """Старое поведение: новый AsyncClient (и новое соединение) на каждый запрос"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"{url}/resumes/r{i % 1000:07d}")
+                response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def run_pooled(url: str, requests: int, concurrency: int) -> float:
+    """Новое поведение: один HHClient с общим пулом keep-alive соединений"""
+    client = HHClient("id", "secret", base_url=url, max_connections=concurrency)
+    await client.startup()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            http = await client._get_client()
+            response = await http.get(f"/resumes/r{i % 1000:07d}")
+            response.raise_for_status()
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return requests / (time.perf_counter() - started)
+    finally:
+        await client.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк пула соединений HHClient")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа сервера, с")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    app = FakeHHApp(latency=args.latency)
+    with ServerThread(app, port=args.port) as server:
+        before = asyncio.run(run_per_call(server.url, args.requests, args.concurrency))
+        after = asyncio.run(run_pooled(server.url, args.requests, args.concurrency))
+
+    print(json.dumps({
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "per_call_rps": round(before, 1),
+        "pooled_rps": round(after, 1),
+        "speedup": round(after / before, 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
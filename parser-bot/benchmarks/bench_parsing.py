@@ -0,0 +1,148 @@
+# Бенчмарк разбора ответов HH: прежний путь через модели pydantic против прямого
+# извлечения полей из словаря (orjson). Корпус — записанные ответы из fixtures,
+# размноженные до --resumes резюме; сеть и база не участвуют.
+#
+#     python -m benchmarks.bench_parsing --resumes 2000
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import orjson
+from pydantic.json import pydantic_encoder
+
+from api.database import json_serializer
+from api.hh_client import HHResume, HHSearchPage, resume_from_hh
+from api.models import ResumeCreate
+from api.utils import parse_hh_datetime, to_utc_naive
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PER_PAGE = 100
+
+# Страница поиска и детали резюме — байты, как они приходят в ответе
+Corpus = List[Tuple[bytes, List[bytes]]]
+
+
+def make_corpus(resumes: int) -> Corpus:
+    search = json.loads((FIXTURES / "hh_search.json").read_text(encoding="utf-8"))
+    detail = json.loads((FIXTURES / "hh_resume.json").read_text(encoding="utf-8"))
+    item = search["items"][0]
+    updated_at = datetime(2024, 1, 1, 12)
+    corpus: Corpus = []
+    for start in range(0, resumes, PER_PAGE):
+        items, details = [], []
+        for index in range(start, min(resumes, start + PER_PAGE)):
+            resume_id = f"{index:08x}{detail['id'][8:]}"
+            stamp = (updated_at - timedelta(minutes=index)).isoformat() + "+0300"
+            months = 12 + index % 120
+            items.append({**item, "id": resume_id, "updated_at": stamp, "total_experience": {"months": months}})
+            details.append(json.dumps(
+                {**detail, "id": resume_id, "updated_at": stamp, "total_experience": {"months": months},
+                 "salary": {"amount": 100000 + index % 50 * 5000, "currency": "RUR"}},
+                ensure_ascii=False
+            ).encode("utf-8"))
+        page = {**search, "items": items}
+        corpus.append((json.dumps(page, ensure_ascii=False).encode("utf-8"), details))
+    return corpus
+
+
+def legacy_convert(hh_resume: HHResume, full_resume: HHResume) -> ResumeCreate:
+    """Прежний _convert_hh_resume: модель из выдачи и модель деталей, json_raw через .dict()"""
+    experience_years = 0
+    if full_resume.total_experience:
+        experience_years = round(full_resume.total_experience.get("months", 0) / 12, 1)
+    salary_expect = None
+    if full_resume.salary:
+        salary_expect = full_resume.salary.to or full_resume.salary.from_
+    contacts = {}
+    if full_resume.contacts:
+        contacts = {"email": full_resume.contacts.get("email"), "phone": full_resume.contacts.get("phone")}
+    return ResumeCreate(
+        source="hh",
+        source_id=hh_resume.id,
+        fio=hh_resume.title,
+        city=hh_resume.area.name,
+        experience_years=experience_years,
+        position=hh_resume.title.split(",")[0].strip(),
+        skills=[skill["name"] for skill in full_resume.skills],
+        salary_expect=salary_expect,
+        published_at=to_utc_naive(hh_resume.updated_at),
+        json_raw={"hh_data": full_resume.dict(), "contacts": contacts}
+    )
+
+
+def legacy_path(corpus: Corpus) -> List[ResumeCreate]:
+    """json.loads → HHResume (выдача и детали) → .dict() → json.dumps для JSONB"""
+    result = []
+    for page, details in corpus:
+        items = [HHResume(**item) for item in json.loads(page.decode("utf-8")).get("items", [])]
+        for hh_resume, raw in zip(items, details):
+            resume = legacy_convert(hh_resume, HHResume(**json.loads(raw.decode("utf-8"))))
+            json.dumps(resume.json_raw, default=pydantic_encoder, ensure_ascii=False)
+            result.append(resume)
+    return result
+
+
+def lean_path(corpus: Corpus) -> List[ResumeCreate]:
+    """orjson.loads → словари выдачи без проверки → resume_from_hh → orjson для JSONB"""
+    result = []
+    for page, details in corpus:
+        data = orjson.loads(page)
+        listing = HHSearchPage.construct(items=data.get("items") or [], found=data.get("found", 0))
+        for item, raw in zip(listing.items, details):
+            parse_hh_datetime(item["updated_at"])  # как в iter_search_pages
+            resume = resume_from_hh(orjson.loads(raw))
+            json_serializer(resume.json_raw)
+            result.append(resume)
+    return result
+
+
+def measure(path: Callable[[Corpus], List[ResumeCreate]], corpus: Corpus, resumes: int, repeat: int) -> dict:
+    # CPU: лучшее из repeat прогонов, без tracemalloc (он замедляет выделения)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        path(corpus)
+        best = min(best, time.process_time() - started)
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = path(corpus)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(result) == resumes
+    return {
+        "cpu_us_per_resume": round(best / resumes * 1e6, 1),
+        "resumes_per_s": round(resumes / best),
+        "retained_kib_per_resume": round((current - before) / resumes / 1024, 2),
+        "peak_kib_per_resume": round((peak - before) / resumes / 1024, 2),
+        # .dict() модели отбрасывает поля, которых нет в HHResume
+        "stored_hh_fields": len(result[0].json_raw["hh_data"]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора ответов HH")
+    parser.add_argument("--resumes", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.resumes)
+    legacy = measure(legacy_path, corpus, args.resumes, args.repeat)
+    lean = measure(lean_path, corpus, args.resumes, args.repeat)
+    print(json.dumps({
+        "resumes": args.resumes,
+        "corpus_kib": round(sum(len(page) + sum(map(len, details)) for page, details in corpus) / 1024),
+        "legacy": legacy,
+        "lean": lean,
+        "cpu_speedup": round(legacy["cpu_us_per_resume"] / lean["cpu_us_per_resume"], 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Оценка предранжирования: насколько меняется итоговый топ-10 при отправке в GPT только top-K
+#
+#     python -m benchmarks.eval_prerank --resumes 1000 --vacancies 20 --k 20,50,100
+#
+# По умолчанию «GPT» — синтетический судья (навыки, опыт, позиция и шум).
+# С --llm оценки берутся у LLMScorer (OPENAI_API_BASE/OPENAI_API_KEY из окружения).
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Sequence
+
+from api.models import Resume
+from api.prerank import prerank
+
+SKILLS = ["Python", "Django", "FastAPI", "SQL", "PostgreSQL", "Docker", "Kubernetes", "Go", "Java", "React",
+          "Linux", "Redis", "Kafka", "Git", "Pandas", "Spark", "Airflow", "C++", "TypeScript", "Celery"]
+POSITIONS = ["Python разработчик", "Backend разработчик", "Data engineer", "DevOps инженер",
+             "Аналитик данных", "Frontend разработчик", "Java разработчик"]
+
+
+def make_corpus(rng: random.Random, size: int) -> List[Resume]:
+    return [
+        Resume(
+            source="hh",
+            source_id=str(index),
+            fio=f"Кандидат {index}",
+            position=rng.choice(POSITIONS),
+            city="Москва",
+            experience_years=rng.randint(0, 15),
+            salary_expect=rng.choice([None, rng.randrange(80_000, 400_000, 10_000)]),
+            skills=rng.sample(SKILLS, rng.randint(2, 8)),
+            json_raw={}
+        )
+        for index in range(size)
+    ]
+
+
+def make_vacancy(rng: random.Random) -> Dict:
+    position = rng.choice(POSITIONS)
+    skills = rng.sample(SKILLS, rng.randint(3, 6))
+    exp_min = rng.randint(0, 6)
+    return {
+        "position": position,
+        "skills": skills,
+        "exp_min": exp_min,
+        "description": f"Ищем: {position}. Требуется опыт от {exp_min} лет. Стек: {', '.join(skills)}.",
+    }
+
+
+def judge(rng: random.Random, resume: Resume, vacancy: Dict, noise: float) -> float:
+    """Синтетическая «оценка GPT» от 0 до 10"""
+    wanted = {skill.casefold() for skill in vacancy["skills"]}
+    matched = len(wanted & {skill.casefold() for skill in resume.skills})
+    skills = matched / len(wanted)
+    experience = 1.0 if resume.experience_years >= vacancy["exp_min"] else max(
+        0.0, 1 - (vacancy["exp_min"] - resume.experience_years) / 3
+    )
+    position = 1.0 if resume.position == vacancy["position"] else 0.3
+    return 10 * (0.5 * skills + 0.25 * experience + 0.25 * position) + rng.gauss(0, noise)
+
+
+async def llm_scores(resumes: Sequence[Resume], description: str) -> Dict[str, float]:
+    from api.openai_utils import LLMScorer
+
+    analyzed = await LLMScorer().analyze(resumes, description)
+    return {analysis.resume.source_id: analysis.score for analysis in analyzed}
+
+
+def top10(scores: Dict[str, float], ids: Sequence[str]) -> List[str]:
+    return sorted((id_ for id_ in ids if id_ in scores), key=lambda id_: (-scores[id_], id_))[:10]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=1000)
+    parser.add_argument("--vacancies", type=int, default=20)
+    parser.add_argument("--k", default="10,20,50,100,200")
+    parser.add_argument("--noise", type=float, default=1.0, help="шум синтетического судьи")
+    parser.add_argument("--llm", action="store_true", help="оценивать через LLMScorer")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = make_corpus(rng, args.resumes)
+    ks = [int(k) for k in args.k.split(",")]
+    report = {k: {"overlap": [], "same_set": [], "same_top1": [], "prerank_ms": []} for k in ks}
+
+    for _ in range(args.vacancies):
+        vacancy = make_vacancy(rng)
+        if args.llm:
+            scores = asyncio.run(llm_scores(corpus, vacancy["description"]))
+        else:
+            scores = {resume.source_id: judge(rng, resume, vacancy, args.noise) for resume in corpus}
+        reference = top10(scores, [resume.source_id for resume in corpus])
+
+        for k in ks:
+            started = time.perf_counter()
+            kept = prerank(corpus, vacancy["description"], k, exp_min=vacancy["exp_min"])
+            report[k]["prerank_ms"].append((time.perf_counter() - started) * 1000)
+            final = top10(scores, [resume.source_id for resume in kept])
+            report[k]["overlap"].append(len(set(final) & set(reference)) / len(reference))
+            report[k]["same_set"].append(set(final) == set(reference))
+            report[k]["same_top1"].append(final[:1] == reference[:1])
+
+    print(json.dumps({
+        "resumes": args.resumes,
+        "vacancies": args.vacancies,
+        "judge": "llm" if args.llm else f"synthetic(noise={args.noise})",
+        "results": [
+            {
+                "k": k,
+                "llm_calls_saved": round(1 - min(k, args.resumes) / args.resumes, 3),
+                "top10_overlap": round(statistics.mean(values["overlap"]), 3),
+                "top10_unchanged_rate": round(statistics.mean(values["same_set"]), 3),
+                "top1_unchanged_rate": round(statistics.mean(values["same_top1"]), 3),
+                "prerank_ms_p50": round(statistics.median(values["prerank_ms"]), 2),
+            }
+            for k, values in report.items()
+        ],
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
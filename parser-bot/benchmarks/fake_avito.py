@@ -0,0 +1,83 @@
+# Локальный фейковый сервер API Avito Работа: ответы собраны из записанных фикстур
+import asyncio
+import copy
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from urllib.parse import parse_qs
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name: str) -> Dict[str, Any]:
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeAvitoApp:
+    """ASGI-приложение с эндпоинтами /token, /job/v1/resumes/ и /job/v2/resumes/{id}.
+    Резюме — копии фикстуры с ID base_id + index, от новых к старым."""
+
+    def __init__(self, total: int = 200, latency: float = 0.0, base_id: int = 4000000000):
+        self.total = total
+        self.latency = latency
+        self.base_id = base_id
+        self.search_item = load_fixture("avito_search.json")["resumes"][0]
+        self.resume = load_fixture("avito_resume.json")
+        self.newest = datetime.utcnow().replace(microsecond=0)
+        self.requests = 0
+
+    def updated_at(self, index: int) -> str:
+        return (self.newest - timedelta(minutes=index)).isoformat() + "+00:00"
+
+    def make_item(self, index: int) -> Dict[str, Any]:
+        item = copy.deepcopy(self.search_item)
+        item.update(id=self.base_id + index, updated_at=self.updated_at(index))
+        return item
+
+    def make_resume(self, index: int) -> Dict[str, Any]:
+        resume = copy.deepcopy(self.resume)
+        resume.update(id=self.base_id + index, updated_at=self.updated_at(index), fullname=f"Кандидат Avito {index}")
+        resume["params"]["experience"] = index % 15
+        return resume
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        status, body = self.handle(scope["path"], parse_qs(scope["query_string"].decode()))
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode())
+        ]})
+        await send({"type": "http.response.body", "body": payload})
+
+    def handle(self, path: str, query: Dict[str, List[str]]):
+        if path == "/token":
+            return 200, {"access_token": "fake-avito-token", "expires_in": 86400, "token_type": "Bearer"}
+        if path == "/job/v1/resumes/":
+            page = int(query.get("page", ["1"])[0])
+            per_page = int(query.get("per_page", ["50"])[0])
+            start = (page - 1) * per_page
+            items = [self.make_item(i) for i in range(start, min(start + per_page, self.total))]
+            pages = (self.total + per_page - 1) // per_page
+            return 200, {"meta": {"page": page, "pages": pages, "per_page": per_page, "total": self.total}, "resumes": items}
+        if path.startswith("/job/v2/resumes/"):
+            index = int(path.rstrip("/").rsplit("/", 1)[1]) - self.base_id
+            if not 0 <= index < self.total:
+                return 404, {"error": {"code": 404, "message": "not found"}}
+            return 200, self.make_resume(index)
+        return 404, {"error": {"code": 404, "message": "not found"}}
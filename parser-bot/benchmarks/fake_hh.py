@@ -0,0 +1,233 @@
+# Локальный фейковый сервер HH API для бенчмарков
+import asyncio
+import functools
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import uvicorn
+
+# «Сейчас» по Москве на момент запуска: самое свежее резюме, от него отсчитываются окна публикации
+BASE_DATE = (datetime.utcnow() + timedelta(hours=3)).replace(second=0, microsecond=0)
+
+
+# Регионы резюме при spread_areas. Как и на HH, резюме бывают привязаны к региону,
+# у которого есть подрегионы (Марий Эл): в выдаче по подрегионам их нет
+CITIES = [("1", "Москва"), ("2", "Санкт-Петербург"), ("1624", "Йошкар-Ола"), ("1620", "Республика Марий Эл")]
+
+
+def resume_updated_at(index: int) -> datetime:
+    """Время обновления резюме (UTC): чем больше индекс, тем старше"""
+    return BASE_DATE - timedelta(hours=3, minutes=index)
+
+
+def resume_months(index: int) -> int:
+    return 12 + index % 120
+
+
+def make_resume(index: int, spread_areas: bool = False) -> Dict[str, Any]:
+    """Синтетическое резюме в формате ответа HH"""
+    updated_at = BASE_DATE - timedelta(minutes=index)
+    area_id, area_name = CITIES[index % len(CITIES)] if spread_areas else CITIES[0]
+    return {
+        "id": f"r{index:07d}",
+        "title": f"Python Developer {index}, Backend",
+        "url": f"https://api.hh.ru/resumes/r{index:07d}",
+        "created_at": (updated_at - timedelta(days=30)).isoformat() + "+0300",
+        "updated_at": updated_at.isoformat() + "+0300",
+        "age": 20 + index % 30,
+        "area": {"id": area_id, "name": area_name},
+        "salary": {"from": 100000 + index % 50 * 5000, "to": None, "currency": "RUR", "gross": False},
+        "experience": [{"position": "Backend Developer", "description": "Разработка сервисов на Python"}],
+        "skills": [{"name": "Python"}, {"name": "Django"}, {"name": f"Skill{index % 17}"}],
+        "contacts": None,
+        "education": [{"name": "МГУ", "year": 2015}],
+        "total_experience": {"months": resume_months(index)},
+    }
+
+
+AREAS = [
+    {
+        "id": "113",
+        "name": "Россия",
+        "areas": [
+            {"id": "1", "name": "Москва", "areas": []},
+            {"id": "2", "name": "Санкт-Петербург", "areas": []},
+            {"id": "1620", "name": "Республика Марий Эл", "areas": [{"id": "1624", "name": "Йошкар-Ола", "areas": []}]},
+        ],
+    }
+]
+
+
+class FakeHHApp:
+    """ASGI-приложение, имитирующее эндпоинты HH: токен, поиск, детали, регионы.
+    Поиск учитывает area (с подрегионами), experience, date_from/date_to
+    и, как HH, отдаёт не больше max_depth результатов одного запроса."""
+
+    def __init__(
+        self,
+        total: int = 1000,
+        latency: float = 0.0,
+        rps_limit: Optional[int] = None,
+        retry_after: int = 1,
+        max_depth: int = 2000,
+        spread_areas: bool = False
+    ):
+        self.total = total
+        self.latency = latency
+        self.rps_limit = rps_limit
+        self.retry_after = retry_after
+        self.max_depth = max_depth
+        self.spread_areas = spread_areas
+        self.searches = 0
+        self.requests = 0
+        self.rejected = 0
+        self.window_start = 0.0
+        self.window_count = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        headers = [(b"content-type", b"application/json")]
+        if self.throttled(scope["path"]):
+            self.rejected += 1
+            status, body = 429, {"errors": [{"type": "too_many_requests"}]}
+            headers.append((b"retry-after", str(self.retry_after).encode()))
+        else:
+            status, body = self.handle(scope["method"], scope["path"], parse_qs(scope["query_string"].decode()))
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        if status == 200:
+            # ETag для условных запросов: совпал If-None-Match — отвечаем 304
+            etag = f'"{hashlib.md5(payload).hexdigest()}"'.encode()
+            headers.append((b"etag", etag))
+            if dict(scope["headers"]).get(b"if-none-match") == etag:
+                status, payload = 304, b""
+        headers.append((b"content-length", str(len(payload)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": payload})
+
+    def throttled(self, path: str) -> bool:
+        """Простое окно в 1 секунду: сверх rps_limit запросов отвечаем 429"""
+        if self.rps_limit is None or path == "/oauth/token":
+            return False
+        now = time.monotonic()
+        if now - self.window_start >= 1.0:
+            self.window_start = now
+            self.window_count = 0
+        self.window_count += 1
+        return self.window_count > self.rps_limit
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]]):
+        if path == "/oauth/token":
+            return 200, {"access_token": "fake-token", "expires_in": 3600}
+        if path == "/areas":
+            return 200, AREAS
+        if path == "/resumes":
+            self.searches += 1
+            page = int(query.get("page", ["0"])[0])
+            per_page = int(query.get("per_page", ["20"])[0])
+            start = page * per_page
+            if start + per_page > self.max_depth:
+                return 400, {"errors": [{"type": "bad_argument", "value": "page"}]}
+            matched = self.search(
+                query.get("area", [None])[0],
+                query.get("experience", [None])[0],
+                query.get("date_from", [None])[0],
+                query.get("date_to", [None])[0]
+            )
+            items = [make_resume(i, self.spread_areas) for i in matched[start:start + per_page]]
+            pages = (len(matched) + per_page - 1) // per_page
+            return 200, {"items": items, "found": len(matched), "pages": pages, "page": page, "per_page": per_page}
+        if path.startswith("/resumes/"):
+            index = int(path.rsplit("/", 1)[1].lstrip("r"))
+            if index >= self.total:
+                return 404, {"errors": [{"type": "not_found"}]}
+            return 200, make_resume(index, self.spread_areas)
+        return 404, {"errors": [{"type": "not_found"}]}
+
+
+    @functools.lru_cache(maxsize=1024)
+    def search(
+        self,
+        area: Optional[str],
+        experience: Optional[str],
+        date_from: Optional[str],
+        date_to: Optional[str]
+    ) -> List[int]:
+        """Индексы подходящих резюме от новых к старым"""
+        areas = descendant_areas(area) if area else None
+        start = datetime.fromisoformat(date_from).replace(tzinfo=None) if date_from else None
+        end = datetime.fromisoformat(date_to).replace(tzinfo=None) if date_to else None
+        matched = []
+        for index in range(self.total):
+            if areas is not None and (CITIES[index % len(CITIES)] if self.spread_areas else CITIES[0])[0] not in areas:
+                continue
+            if experience and experience != experience_bucket(resume_months(index)):
+                continue
+            updated_at = resume_updated_at(index)
+            if (start and updated_at < start) or (end and updated_at > end):
+                continue
+            matched.append(index)
+        return matched
+
+
+def descendant_areas(area_id: str) -> set:
+    """Регион и все его подрегионы из AREAS"""
+    found = set()
+
+    def walk(areas: List[Dict[str, Any]], inside: bool) -> None:
+        for area in areas:
+            matched = inside or area["id"] == area_id
+            if matched:
+                found.add(area["id"])
+            walk(area.get("areas") or [], matched)
+
+    walk(AREAS, False)
+    return found
+
+
+def experience_bucket(months: int) -> str:
+    if months < 12:
+        return "noExperience"
+    if months < 36:
+        return "between1And3"
+    if months < 72:
+        return "between3And6"
+    return "moreThan6"
+
+
+class ServerThread:
+    """Запуск ASGI-приложения через uvicorn в фоновом потоке"""
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 8765):
+        self.config = uvicorn.Config(app, host=host, port=port, log_level="error", lifespan="on")
+        self.server = uvicorn.Server(self.config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.url = f"http://{host}:{port}"
+
+    def __enter__(self) -> "ServerThread":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc: Optional[BaseException]) -> None:
+        self.server.should_exit = True
+        self.thread.join()
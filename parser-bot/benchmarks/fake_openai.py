@@ -0,0 +1,89 @@
+# Локальный фейковый сервер OpenAI Chat Completions для бенчмарков
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, Dict, List
+
+_BLOCK = re.compile(r"^\[(\d+)\]\n(.*?)(?=\n\n\[\d+\]\n|\Z)", re.S | re.M)
+
+
+def fake_score(text: str) -> float:
+    """Детерминированная «оценка» резюме по его тексту"""
+    digest = hashlib.md5(text.encode("utf-8")).digest()
+    return round(digest[0] / 255 * 10, 1)
+
+
+class FakeOpenAIApp:
+    """ASGI-приложение: /v1/chat/completions с задержкой и долей битых ответов"""
+
+    def __init__(self, latency: float = 0.0, malformed_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            payload = json.dumps(self.complete(json.loads(body)), ensure_ascii=False).encode("utf-8")
+        finally:
+            self.in_flight -= 1
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    def complete(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        messages: List[Dict[str, str]] = request["messages"]
+        user = messages[-1]["content"]
+        resumes = user.split("Резюме:\n", 1)[-1]
+
+        if self.random.random() < self.malformed_rate:
+            content = "Извините, не могу оценить это резюме."
+        elif "JSON-массив" in messages[0]["content"]:
+            content = json.dumps([
+                {"index": int(index), "score": fake_score(text.strip()), "details": "Пакетная оценка"}
+                for index, text in _BLOCK.findall(resumes)
+            ], ensure_ascii=False)
+        else:
+            content = json.dumps({"score": fake_score(resumes.strip()), "details": "Оценка"}, ensure_ascii=False)
+
+        return {
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(user) // 3, "completion_tokens": len(content) // 3,
+                      "total_tokens": (len(user) + len(content)) // 3},
+        }
@@ -1,14 +1,116 @@
 import os
+import json
 import httpx
+import asyncio
 import logging
-from telegram import Update
+import weakref
+from typing import AsyncIterator, Optional
+from telegram import Update, Message
 from telegram.ext import ContextTypes
-import openai
-import json
+from telegram.error import BadRequest, RetryAfter
 
 logger = logging.getLogger(__name__)
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Поиск выполняется в фоне на стороне API; ход поиска приходит потоком SSE
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "600"))
+# Telegram ограничивает частоту правок сообщения — не чаще раза в EDIT_INTERVAL секунд
+EDIT_INTERVAL = 1.5
+# Сколько поисков одновременно может запустить один чат
+CHAT_MAX_SEARCHES = int(os.getenv("CHAT_MAX_SEARCHES", "1"))
+MESSAGE_LIMIT = 4096
+
+STAGES = {
+    "harvest": "собираем резюме с площадок",
+    "prerank": "отбираем кандидатов",
+    "scoring": "оцениваем кандидатов",
+}
+
+def api_base_url() -> str:
+    base_url = os.getenv('API_URL', '').rstrip('/')
+    if not base_url.startswith(('http://', 'https://')):
+        base_url = f"http://{base_url}"
+    return base_url
+
+def create_api_client() -> httpx.AsyncClient:
+    """Общий клиент API на всё время работы бота (пул соединений и keep-alive).
+    Чтение без короткого таймаута: поток SSE молчит до heartbeat сервера."""
+    return httpx.AsyncClient(
+        base_url=api_base_url(),
+        timeout=httpx.Timeout(10.0, read=60.0),
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+    )
+
+async def iter_job_events(client: httpx.AsyncClient, job_id: str) -> AsyncIterator[dict]:
+    """Состояния задачи поиска из потока Server-Sent Events"""
+    async with client.stream("GET", f"/search/{job_id}/events") as response:
+        response.raise_for_status()
+        data = []
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                data.append(line[5:].strip())
+            elif not line and data:
+                yield json.loads("\n".join(data))
+                data = []
+
+def format_job(job: dict) -> str:
+    """Текст сообщения с ходом поиска и текущим топом"""
+    progress = job.get("progress", {})
+    if job["status"] == "done":
+        header = f"✅ Поиск завершён: оценено {progress.get('scored', 0)} из {progress.get('candidates', 0)} кандидатов"
+    elif job["status"] == "queued":
+        header = "⏳ Поиск в очереди"
+    else:
+        header = f"🔍 Поиск: {STAGES.get(job.get('stage'), 'запускаем')}"
+        if job.get("stage") == "harvest":
+            header += f" (найдено {progress.get('found', 0)}, загружено {progress.get('fetched', 0)})"
+        elif job.get("stage") == "scoring":
+            header += f" ({progress.get('scored', 0)} из {progress.get('to_score', 0)})"
+
+    lines = [header]
+    if job.get("top"):
+        lines.append("\nТоп кандидатов:")
+        for index, candidate in enumerate(job["top"], 1):
+            lines.append(
+                f"{index}. {candidate.get('fio') or 'Без имени'} — {candidate.get('position') or '—'}, "
+                f"опыт {candidate.get('experience_years') or 0} лет, оценка {candidate['score']:.1f}\n"
+                f"   {', '.join(candidate.get('skills') or [])[:200]}\n"
+                f"   {candidate.get('details', '')[:300]}"
+            )
+    return "\n".join(lines)[:MESSAGE_LIMIT]
+
+class LiveMessage:
+    """Одно сообщение Telegram, которое обновляется на месте не чаще interval секунд"""
+
+    def __init__(self, message: Message, interval: float = EDIT_INTERVAL):
+        self.message = message
+        self.interval = interval
+        self.text = message.text
+        self.edited_at = 0.0
+
+    async def update(self, text: str, force: bool = False) -> None:
+        loop = asyncio.get_running_loop()
+        if text == self.text or (not force and loop.time() - self.edited_at < self.interval):
+            return
+        try:
+            await self.message.edit_text(text)
+        except RetryAfter as e:
+            if not force:
+                return  # следующее обновление принесёт более свежее состояние
+            await asyncio.sleep(e.retry_after)
+            await self.message.edit_text(text)
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+        self.text = text
+        self.edited_at = loop.time()
+
+def chat_semaphore(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> asyncio.Semaphore:
+    """Лимит одновременных поисков чата; неиспользуемые семафоры удаляются сами"""
+    limits = context.bot_data.setdefault("chat_limits", weakref.WeakValueDictionary())
+    semaphore = limits.get(chat_id)
+    if semaphore is None:
+        semaphore = limits[chat_id] = asyncio.Semaphore(CHAT_MAX_SEARCHES)
+    return semaphore
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /start"""
@@ -16,73 +118,67 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Привет! Пришли мне описание вакансии, и я найду подходящих кандидатов с HeadHunter."
     )
 
+async def follow_job(client: httpx.AsyncClient, job: dict, live: LiveMessage) -> dict:
+    """Показывает ход поиска, пока задача не завершится; возвращает итоговое состояние"""
+    async for job in iter_job_events(client, job["id"]):
+        await live.update(format_job(job), force=job["status"] in ("done", "failed", "cancelled"))
+    if job["status"] in ("queued", "running"):
+        # Поток оборвался до завершения — берём состояние напрямую
+        response = await client.get(f"/search/{job['id']}")
+        response.raise_for_status()
+        job = response.json()
+    return job
+
 async def handle_job_description(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик текстовых сообщений с описанием вакансии"""
-    try:
-        job_description = update.message.text
-
-        # Пример фильтров (можно получать от пользователя)
-        min_experience = 2  # минимальный опыт в годах
-        required_skills = {"python", "django"}  # обязательные навыки
+    semaphore = chat_semaphore(context, update.effective_chat.id)
+    if semaphore.locked():
+        await update.message.reply_text("Предыдущий поиск ещё идёт — дождитесь его результатов.")
+        return
 
-        base_url = os.getenv('API_URL', '').rstrip('/')
-        if not base_url.startswith(('http://', 'https://')):
-            base_url = f"http://{base_url}"
+    async with semaphore:
+        job: Optional[dict] = None
+        client: httpx.AsyncClient = context.bot_data["api_client"]
+        try:
+            job_description = update.message.text
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
             response = await client.post(
-                f"{base_url}/search/",
+                "/search/",
                 json={
                     "position": "Python Developer",
                     "city": "Москва",
                     "description": job_description
                 }
             )
-
-        if response.status_code == 200:
-            candidates = response.json()
-            if not candidates:
-                await update.message.reply_text("По вашему запросу кандидатов не найдено.")
+            if response.status_code != 202:
+                logger.error(f"API error: {response.status_code} - {response.text}")
+                await update.message.reply_text("Произошла ошибка при поиске кандидатов. Попробуйте позже.")
                 return
 
-            # --- Отправка кандидатов в ChatGPT ---
-            prompt = (
-                f"Вакансия: {job_description}\n"
-                f"Вот список кандидатов в формате JSON:\n"
-                f"{candidates}\n"
-                "Проранжируй кандидатов по релевантности вакансии и выведи топ-5 с кратким пояснением, почему они в топе. "
-                "Ответ верни в структурированном виде: ФИО, опыт, навыки, причина попадания в топ."
-            )
+            job = response.json()
+            live = LiveMessage(await update.message.reply_text(format_job(job)))
+            job = await asyncio.wait_for(follow_job(client, job, live), SEARCH_TIMEOUT)
 
-            openai.api_key = OPENAI_API_KEY
-            chat_response = await openai.ChatCompletion.acreate(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000,
-                temperature=0.2,
-            )
-            answer = chat_response.choices[0].message.content
-
-            # Сохраняем результат для админ-панели
-            with open("ranked_candidates.json", "a", encoding="utf-8") as f:
-                json.dump({
-                    "job_description": job_description,
-                    "ranked": answer
-                }, f, ensure_ascii=False)
-                f.write("\n")
-
-            await update.message.reply_text("🔍 Вот топ кандидатов по мнению ChatGPT:\n" + answer)
-
-        else:
-            logger.error(f"API error: {response.status_code} - {response.text}")
-            await update.message.reply_text("Произошла ошибка при поиске кандидатов. Попробуйте позже.")
-
-    except httpx.ConnectError:
-        logger.error("Connection error to API")
-        await update.message.reply_text("Не удалось подключиться к сервису поиска. Попробуйте позже.")
-    except httpx.TimeoutException:
-        logger.error("API timeout")
-        await update.message.reply_text("Сервис поиска не отвечает. Попробуйте позже.")
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        await update.message.reply_text("Произошла непредвиденная ошибка. Мы уже работаем над её устранением.")
\ No newline at end of file
+            if job["status"] != "done":
+                logger.error(f"Search job {job['id']} finished with {job['status']}: {job.get('error')}")
+                await live.update("Произошла ошибка при поиске кандидатов. Попробуйте позже.", force=True)
+                return
+            # Итог поиска для админ-панели сохраняет сам API (таблица rankingresult)
+            if not job["top"]:
+                await live.update("По вашему запросу кандидатов не найдено.", force=True)
+
+        except asyncio.TimeoutError:
+            logger.error("Search job timeout")
+            if job:
+                # Отсоединяемся от задачи: API отменит её, только если других клиентов нет
+                await client.delete(f"/search/{job['id']}")
+            await update.message.reply_text("Поиск занял слишком много времени. Попробуйте позже.")
+        except httpx.ConnectError:
+            logger.error("Connection error to API")
+            await update.message.reply_text("Не удалось подключиться к сервису поиска. Попробуйте позже.")
+        except httpx.TimeoutException:
+            logger.error("API timeout")
+            await update.message.reply_text("Сервис поиска не отвечает. Попробуйте позже.")
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            await update.message.reply_text("Произошла непредвиденная ошибка. Мы уже работаем над её устранением.")
@@ -5,7 +5,7 @@ from telegram.ext import Application, CommandHandler, MessageHandler, filters
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.error import Conflict
-from handlers import start, handle_job_description
+from handlers import start, handle_job_description, create_api_client
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,6 +22,12 @@ async def post_init(application):
     await application.bot.set_my_commands([
         ("start", "Начать работу с ботом"),
     ])
+    # Общий для всех обработчиков клиент API
+    application.bot_data["api_client"] = create_api_client()
+
+async def post_shutdown(application):
+    """Закрытие клиента API"""
+    await application.bot_data["api_client"].aclose()
 
 async def shutdown(application):
     """Функция для корректного завершения работы"""
@@ -40,6 +46,8 @@ def main() -> None:
         application = Application.builder() \
             .token(token) \
             .post_init(post_init) \
+            .post_shutdown(post_shutdown) \
+            .concurrent_updates(True) \
             .read_timeout(30) \
             .get_updates_read_timeout(30) \
             .build()
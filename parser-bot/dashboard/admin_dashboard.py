@@ -1,16 +1,88 @@
 # admin_dashboard.py
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+import pandas as pd
 import streamlit as st
-import json
+
+from results_store import create_store_engine, fetch_page
+
+PAGE_SIZE = 20
 
 st.title("Результаты ранжирования кандидатов")
 
-try:
-    with open("ranked_candidates.json", "r", encoding="utf-8") as f:
-        for line in f:
-            record = json.loads(line)
-            st.subheader("Вакансия:")
-            st.write(record["job_description"])
-            st.subheader("Топ кандидатов:")
-            st.write(record["ranked"])
-except FileNotFoundError:
-    st.info("Пока нет данных о ранжированных кандидатах.")
\ No newline at end of file
+
+@st.cache_resource
+def get_engine():
+    try:
+        return create_store_engine()
+    except RuntimeError as e:
+        st.error(str(e))
+        st.stop()
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_page(
+    cursor: Optional[str],
+    text: str,
+    city: str,
+    since: Optional[date],
+    until: Optional[date],
+    min_score: float
+):
+    """Страница итогов; одинаковые запросы в течение минуты берутся из кэша"""
+    return fetch_page(
+        get_engine(),
+        cursor=cursor,
+        limit=PAGE_SIZE,
+        text=text or None,
+        city=city or None,
+        since=datetime.combine(since, time.min) if since else None,
+        until=datetime.combine(until + timedelta(days=1), time.min) if until else None,
+        min_score=min_score or None
+    )
+
+
+# Фильтры; при их изменении возвращаемся на первую страницу
+with st.sidebar:
+    st.header("Фильтры")
+    text = st.text_input("Вакансия или должность")
+    city = st.text_input("Город")
+    period = st.date_input("Период", value=())
+    min_score = st.slider("Минимальная оценка лучшего кандидата", 0.0, 10.0, 0.0, 0.5)
+    if st.button("Обновить данные"):
+        load_page.clear()
+
+since, until = (tuple(period) + (None, None))[:2] if period else (None, None)
+filters = (text, city, since, until, min_score)
+if st.session_state.get("filters") != filters:
+    st.session_state.filters = filters
+    st.session_state.cursors = [None]  # курсоры просмотренных страниц для «Назад»
+
+cursors = st.session_state.cursors
+rows, next_cursor = load_page(cursors[-1], *filters)
+
+if not rows:
+    st.info("Пока нет данных о ранжированных кандидатах.")
+
+for row in rows:
+    title = f"{row['created_at']:%d.%m.%Y %H:%M} · {row['position']} · {row['city'] or '—'}"
+    if row["top_score"] is not None:
+        title += f" · лучшая оценка {row['top_score']:.1f}"
+    with st.expander(title):
+        st.write(row["job_description"])
+        st.caption(f"Рассмотрено резюме: {row['candidates']}")
+        if row["top"]:
+            st.dataframe(
+                pd.DataFrame(row["top"])[["fio", "position", "experience_years", "score", "details"]],
+                use_container_width=True
+            )
+
+previous_col, page_col, next_col = st.columns([1, 2, 1])
+if previous_col.button("← Назад", disabled=len(cursors) == 1):
+    cursors.pop()
+    st.experimental_rerun()
+page_col.write(f"Страница {len(cursors)}")
+if next_col.button("Вперёд →", disabled=next_cursor is None):
+    cursors.append(next_cursor)
+    st.experimental_rerun()
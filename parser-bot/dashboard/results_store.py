@@ -0,0 +1,97 @@
+# Чтение итогов поисков (таблица rankingresult, её пишет API) для админ-панели
+import base64
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    JSON, Column, DateTime, Float, Integer, MetaData, String, Table, Uuid,
+    create_engine, or_, select, tuple_
+)
+from sqlalchemy.engine import Engine
+
+# Та же таблица, что api.models.RankingResult (создаёт и заполняет API, migrations/006)
+metadata = MetaData()
+ranking_results = Table(
+    "rankingresult",
+    metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("job_id", String(32), nullable=False),
+    Column("vacancy_hash", String(64), nullable=False),
+    Column("job_description", String, nullable=False),
+    Column("position", String(100), nullable=False),
+    Column("city", String(50)),
+    Column("candidates", Integer, nullable=False),
+    Column("top_score", Float),
+    Column("top", JSON),
+    Column("created_at", DateTime, nullable=False),
+)
+
+
+def sync_database_url(url: str) -> str:
+    """postgresql+asyncpg://... → postgresql://... для синхронного драйвера"""
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def create_store_engine(url: Optional[str] = None) -> Engine:
+    """Подключение к базе API (PostgreSQL): других писателей у rankingresult нет"""
+    url = url or os.getenv("DASHBOARD_DATABASE_URL") or os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("Не задан DASHBOARD_DATABASE_URL или DATABASE_URL — база API с итогами поисков")
+    return create_engine(sync_database_url(url), pool_pre_ping=True)
+
+
+def encode_cursor(created_at: datetime, result_id: uuid.UUID) -> str:
+    payload = json.dumps([created_at.isoformat(), str(result_id)])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, result_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), uuid.UUID(result_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError("Некорректный курсор") from e
+
+
+def fetch_page(
+    engine: Engine,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    text: Optional[str] = None,
+    city: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    min_score: Optional[float] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Страница итогов от новых к старым с keyset-пагинацией по (created_at, id):
+    время запроса не зависит ни от глубины страницы, ни от размера истории"""
+    table = ranking_results
+    query = select(table)
+
+    if text:
+        query = query.where(or_(table.c.job_description.ilike(f"%{text}%"), table.c.position.ilike(f"%{text}%")))
+    if city:
+        query = query.where(table.c.city.ilike(f"%{city}%"))
+    if since:
+        query = query.where(table.c.created_at >= since)
+    if until:
+        query = query.where(table.c.created_at < until)
+    if min_score is not None:
+        query = query.where(table.c.top_score >= min_score)
+    if cursor:
+        query = query.where(tuple_(table.c.created_at, table.c.id) < tuple_(*decode_cursor(cursor)))
+
+    query = query.order_by(table.c.created_at.desc(), table.c.id.desc()).limit(limit + 1)
+    with engine.connect() as conn:
+        rows = [dict(row._mapping) for row in conn.execute(query)]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
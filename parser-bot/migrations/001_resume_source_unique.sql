@@ -0,0 +1,14 @@
+-- Уникальность резюме по (source, source_id) для bulk_upsert.
+-- Перед созданием ограничения удаляем старые копии одного и того же резюме.
+-- Если на копии ссылаются записи duplicate, их нужно удалить заранее.
+BEGIN;
+
+DELETE FROM resume r
+USING resume newer
+WHERE r.source = newer.source
+  AND r.source_id = newer.source_id
+  AND (r.updated_at, r.id::text) < (newer.updated_at, newer.id::text);
+
+ALTER TABLE resume ADD CONSTRAINT uq_resume_source UNIQUE (source, source_id);
+
+COMMIT;
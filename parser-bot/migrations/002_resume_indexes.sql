@@ -0,0 +1,10 @@
+-- Индексы для фильтров CRUDResume.get_multi/get_page и keyset-пагинации.
+-- CONCURRENTLY не блокирует запись, но не работает внутри транзакции.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_resume_position_trgm ON resume USING gin (position gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_resume_fio_trgm ON resume USING gin (fio gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_resume_city_trgm ON resume USING gin (city gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_resume_skills ON resume USING gin (skills);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_resume_experience_years ON resume (experience_years);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_resume_published_at_id ON resume (published_at DESC NULLS LAST, id DESC);
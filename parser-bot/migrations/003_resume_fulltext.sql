@@ -0,0 +1,26 @@
+-- Полнотекстовый поиск по резюме (CRUDResume.search).
+-- Добавление STORED-колонки переписывает таблицу — запускать в окно обслуживания.
+BEGIN;
+
+CREATE OR REPLACE FUNCTION resume_search_document(p_position text, p_skills text[], p_raw json)
+RETURNS tsvector
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT setweight(to_tsvector('russian', coalesce(p_position, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(array_to_string(p_skills, ' '), '')), 'B')
+        || setweight(to_tsvector('russian', coalesce((
+            SELECT string_agg(concat_ws(' ', e->>'position', e->>'description'), ' ')
+            FROM json_array_elements(
+                CASE WHEN json_typeof(p_raw->'hh_data'->'experience') = 'array'
+                     THEN p_raw->'hh_data'->'experience'
+                     ELSE '[]'::json END
+            ) AS e
+        ), '')), 'C')
+$$;
+
+ALTER TABLE resume
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (resume_search_document(position, skills, json_raw)) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_resume_search_vector ON resume USING gin (search_vector);
+
+COMMIT;
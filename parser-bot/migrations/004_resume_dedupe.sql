@@ -0,0 +1,19 @@
+-- Хранилище MinHash-сигнатур и уникальность пар дублей (api/dedupe.py)
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS resumesignature (
+    resume_id uuid PRIMARY KEY REFERENCES resume (id) ON DELETE CASCADE,
+    signature bigint[],
+    bands bigint[],
+    computed_at timestamp NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_resumesignature_bands ON resumesignature USING gin (bands);
+
+ALTER TABLE duplicate ADD COLUMN IF NOT EXISTS score double precision;
+
+DELETE FROM duplicate d
+USING duplicate other
+WHERE d.orig = other.orig AND d.dup = other.dup AND d.id::text > other.id::text;
+ALTER TABLE duplicate ADD CONSTRAINT uq_duplicate_pair UNIQUE (orig, dup);
+
+COMMIT;
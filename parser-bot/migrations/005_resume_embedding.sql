@@ -0,0 +1,14 @@
+-- Эмбеддинги резюме и HNSW-индекс для семантического поиска (api/embeddings.py).
+-- Размерность должна совпадать с EMBEDDING_DIM (по умолчанию 256).
+-- После миграции заполнить эмбеддинги: POST /embeddings/backfill
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+ALTER TABLE resume ADD COLUMN IF NOT EXISTS embedding vector(256);
+
+COMMIT;
+
+-- HNSW строится долго на большой таблице: вне транзакции, без блокировки записи
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_resume_embedding_hnsw
+    ON resume USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,19 @@
+-- Итоги поисков для админ-панели (dashboard/results_store.py)
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS rankingresult (
+    id uuid PRIMARY KEY,
+    job_id varchar(32) NOT NULL,
+    vacancy_hash varchar(64) NOT NULL,
+    job_description varchar NOT NULL,
+    position varchar(100) NOT NULL,
+    city varchar(50),
+    candidates integer NOT NULL,
+    top_score double precision,
+    top json,
+    created_at timestamp NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_rankingresult_created_at_id ON rankingresult (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_rankingresult_vacancy_created_at ON rankingresult (vacancy_hash, created_at);
+
+COMMIT;
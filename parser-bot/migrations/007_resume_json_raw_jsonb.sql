@@ -0,0 +1,39 @@
+-- json_raw: json → jsonb со сжатием lz4 (PostgreSQL 14+).
+-- Генерируемая колонка search_vector зависит от json_raw и функции resume_search_document,
+-- поэтому пересоздаётся вместе с ними. Таблица переписывается — запускать в окно обслуживания.
+BEGIN;
+
+DROP INDEX IF EXISTS ix_resume_search_vector;
+ALTER TABLE resume DROP COLUMN IF EXISTS search_vector;
+DROP FUNCTION IF EXISTS resume_search_document(text, text[], json);
+
+-- Одной командой: строки переписываются один раз и сразу сжимаются lz4
+ALTER TABLE resume
+    ALTER COLUMN json_raw TYPE jsonb USING json_raw::jsonb,
+    ALTER COLUMN json_raw SET COMPRESSION lz4;
+
+CREATE OR REPLACE FUNCTION resume_search_document(p_position text, p_skills text[], p_raw jsonb)
+RETURNS tsvector
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT setweight(to_tsvector('russian', coalesce(p_position, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(array_to_string(p_skills, ' '), '')), 'B')
+        || setweight(to_tsvector('russian', coalesce((
+            SELECT string_agg(concat_ws(' ', e->>'position', e->>'description'), ' ')
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(p_raw->'hh_data'->'experience') = 'array'
+                     THEN p_raw->'hh_data'->'experience'
+                     ELSE '[]'::jsonb END
+            ) AS e
+        ), '')), 'C')
+$$;
+
+ALTER TABLE resume
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (resume_search_document(position, skills, json_raw)) STORED;
+
+CREATE INDEX ix_resume_search_vector ON resume USING gin (search_vector);
+
+COMMIT;
+
+-- Обновить статистику после перезаписи таблицы
+ANALYZE resume;
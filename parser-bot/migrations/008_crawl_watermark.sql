@@ -0,0 +1,16 @@
+-- Водяные знаки и аренда запросов фонового сборщика (api/crawler.py)
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS crawlwatermark (
+    key varchar(40) PRIMARY KEY,
+    position varchar(100) NOT NULL,
+    city varchar(50) NOT NULL,
+    watermark timestamp,
+    crawled_at timestamp,
+    lease_owner varchar(64),
+    lease_until timestamp,
+    stored integer NOT NULL,
+    last_error varchar
+);
+
+COMMIT;
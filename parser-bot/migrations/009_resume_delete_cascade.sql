@@ -0,0 +1,21 @@
+-- Сигнатура и пары дублей удаляются вместе с резюме: без каскада удаление
+-- резюме с сигнатурой или в паре дублей падало на внешнем ключе
+-- (для баз, где 004 уже применена, а duplicate создана без каскада)
+BEGIN;
+
+ALTER TABLE resumesignature DROP CONSTRAINT IF EXISTS resumesignature_resume_id_fkey;
+ALTER TABLE resumesignature
+    ADD CONSTRAINT resumesignature_resume_id_fkey
+    FOREIGN KEY (resume_id) REFERENCES resume (id) ON DELETE CASCADE;
+
+ALTER TABLE duplicate DROP CONSTRAINT IF EXISTS duplicate_orig_fkey;
+ALTER TABLE duplicate
+    ADD CONSTRAINT duplicate_orig_fkey
+    FOREIGN KEY (orig) REFERENCES resume (id) ON DELETE CASCADE;
+
+ALTER TABLE duplicate DROP CONSTRAINT IF EXISTS duplicate_dup_fkey;
+ALTER TABLE duplicate
+    ADD CONSTRAINT duplicate_dup_fkey
+    FOREIGN KEY (dup) REFERENCES resume (id) ON DELETE CASCADE;
+
+COMMIT;
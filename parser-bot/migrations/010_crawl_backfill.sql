@@ -0,0 +1,9 @@
+-- Продолжение обхода, остановленного на CRAWL_LIMIT (api/crawler.py):
+-- следующие обходы берут резюме старше backfill_to, пока проход не завершится
+BEGIN;
+
+ALTER TABLE crawlwatermark
+    ADD COLUMN IF NOT EXISTS backfill_to timestamp,
+    ADD COLUMN IF NOT EXISTS backfill_watermark timestamp;
+
+COMMIT;